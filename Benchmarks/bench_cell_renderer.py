@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the compiled cell formats of Tabular (_CellRenderer).
+
+Renders a table of 100k (value, uncertainty) cells cell by cell with
+recompiled formats (LRU size 0, the behaviour without cache) and with the
+cached formats, and once with the batch formatter for comparison.
+
+usage: python Benchmarks/bench_cell_renderer.py [n_cells]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'LatexInterface'))
+import LatexInterface as li
+
+def make_cells(n_cells, seed = 0):
+    "values and uncertainties with mixed magnitudes, 10% without uncertainty"
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1, n_cells) * 10**rng.uniform(-4, 4, n_cells)
+    uncertainty = np.abs(values) * 10**rng.uniform(-4, 0, n_cells)
+    uncertainty[rng.random(n_cells) < 0.1] = 0
+    return values, uncertainty
+
+def time_cellwise(table, cells, cs = 16, delimiter = ',', pm = ' +- '):
+    start = time.perf_counter()
+    for cell in cells:
+        table.tupel2Tabularcell(cell, cs, delimiter, pm)
+    return time.perf_counter() - start
+
+def main(n_cells = 100000):
+    values, uncertainty = make_cells(n_cells)
+    cells = list(zip(values.tolist(), uncertainty.tolist()))
+    table = li.Tabular([[0]], [[]])
+
+    table._renderer = li._CellRenderer(maxsize = 0)
+    t_uncached = time_cellwise(table, cells)
+    table._renderer = li._CellRenderer()
+    t_cached = time_cellwise(table, cells)
+
+    start = time.perf_counter()
+    table.arrays2Tabularcells(values, uncertainty, 16, ',', ' +- ')
+    t_batch = time.perf_counter() - start
+
+    print("cells:                 {:d}".format(n_cells))
+    for name, t in (("per cell, no cache", t_uncached),
+                    ("per cell, cached", t_cached),
+                    ("batch, cached", t_batch)):
+        print("{:<22s} {:8.3f} s  {:8.3f} us/cell  speedup {:5.2f}".format(
+              name + ":", t, 1e6*t/n_cells, t_uncached/t))
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the streaming duplex (duplex.interleave) against the
+PdfFileWriter based one (duplex.merge).
+
+Both interleave a synthetic pair of scans with n_pages pages each. Every
+page has its own compressed content stream of about kb_per_page KiB, all
+pages share one font. The peak memory is measured with tracemalloc in a
+second run, since tracing slows the merge down.
+
+usage: python Benchmarks/bench_duplex.py [n_pages] [kb_per_page]
+"""
+
+import os
+import sys
+import time
+import zlib
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'Utilities'))
+import duplex
+
+def synthetic_scan(filename, n_pages, kb_per_page, seed):
+    """writes a PDF with n_pages pages, each with an incompressible content
+       stream of about kb_per_page KiB"""
+    offsets = []
+    with open(filename, 'wb') as f:
+        def obj(body):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n' % len(offsets) + body + b'\nendobj\n')
+
+        f.write(b'%PDF-1.4\n')
+        obj(b'<< /Type /Catalog /Pages 2 0 R >>')
+        kids = b' '.join(b'%d 0 R' % (4 + 2*i) for i in range(n_pages))
+        obj(b'<< /Type /Pages /Kids [ ' + kids + b' ] /Count %d >>' % n_pages)
+        obj(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+        for i in range(n_pages):
+            obj(b'<< /Type /Page /Parent 2 0 R /MediaBox [ 0 0 595 842 ] '
+                b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+                % (5 + 2*i))
+            text = b'BT /F1 24 Tf 72 720 Td (%d %d) Tj ET\n' % (seed, i)
+            noise = os.urandom(1024*kb_per_page).hex().encode('ascii')
+            data = zlib.compress(text + b'% ' + noise)
+            obj(b'<< /Filter /FlateDecode /Length %d >>\nstream\n' % len(data)
+                + data + b'\nendstream')
+
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(offsets) + 1))
+        f.write(b''.join(b'%010d 00000 n \n' % o for o in offsets))
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                % (len(offsets) + 1, xref))
+
+def main(n_pages = 1000, kb_per_page = 64):
+    with tempfile.TemporaryDirectory() as tmp:
+        front = os.path.join(tmp, 'front.pdf')
+        back = os.path.join(tmp, 'back.pdf')
+        out = os.path.join(tmp, 'stack.pdf')
+        synthetic_scan(front, n_pages, kb_per_page, 0)
+        synthetic_scan(back, n_pages, kb_per_page, 1)
+        size = os.path.getsize(front) + os.path.getsize(back)
+
+        print("pages:        2 x {:d}, {:.1f} MiB".format(n_pages, size/2**20))
+        for name, func in (("merge", duplex.merge),
+                           ("interleave", duplex.interleave)):
+            start = time.perf_counter()
+            pages = func(front, back, out)
+            t = time.perf_counter() - start
+
+            tracemalloc.start()
+            func(front, back, out)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("{:<13s} {:8.3f} s  {:8.1f} pages/s  peak {:8.1f} MiB".format(
+                  name + ":", t, pages/t, peak/2**20))
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of Tabular.fromArrays against the list based constructor.
+
+Both build the same tabular from a (n_row, n_col) array of values and
+uncertainties. The list based constructor gets the rows as lists of
+numpy.ndarrays, the input it was designed for.
+
+usage: python Benchmarks/bench_from_arrays.py [n_row] [n_col]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'LatexInterface'))
+import LatexInterface as li
+
+def best_of(func, repeat = 5):
+    "shortest of repeat runs of func() in seconds"
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(n_row = 1000, n_col = 100):
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, (n_row, n_col))
+    uncertainty = np.abs(rng.normal(0, 0.1, (n_row, n_col)))
+    val_list = list(values)
+    unc_list = list(uncertainty)
+
+    t_list = best_of(lambda: li.Tabular(val_list, unc_list))
+    t_arrays = best_of(lambda: li.Tabular.fromArrays(values, uncertainty))
+
+    print("cells:                 {:d}".format(n_row*n_col))
+    for name, t in (("Tabular(lists)", t_list),
+                    ("Tabular.fromArrays", t_arrays)):
+        print("{:<22s} {:8.4f} s  {:8.4f} us/cell  speedup {:6.1f}".format(
+              name + ":", t, 1e6*t/(n_row*n_col), t_list/t))
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Import time benchmark of the modules with a regression budget.
+
+Each module is imported in a fresh interpreter with 'python -X importtime'.
+The time of the import without numpy, which every module needs, is compared
+with the budget of the module, and the heavy modules that must only be
+imported on first use must not show up at all. The best of 'repeat' runs
+counts. Exits with 1 if a module is over its budget or imports a heavy
+module.
+
+usage: python Benchmarks/bench_import.py [repeat]
+"""
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# module: (directory, budget in ms without numpy, lazily imported modules)
+MODULES = {
+    'LatexInterface': ('LatexInterface', 30,
+                       ('subprocess', 'tempfile', 'concurrent.futures',
+                        'zipfile', 'csv')),
+    'phasor':         ('Utilities', 30,
+                       ('matplotlib', 'matplotlib.pyplot',
+                        'concurrent.futures')),
+    'duplex':         ('Utilities', 30,
+                       ('PyPDF2', 'concurrent.futures')),
+    'myUtilities':    ('Utilities', 15,
+                       ('multiprocessing',)),
+    }
+
+def import_times(module, directory):
+    """imports module in a new interpreter, returns the cumulative import
+       times in us per imported module"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.join(ROOT, directory),
+                                         env.get('PYTHONPATH', '')])
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import ' + module],
+                            env = env, stderr = subprocess.PIPE,
+                            universal_newlines = True, check = True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def main(repeat = 5):
+    failed = False
+    print("{:<16s} {:>10s} {:>10s} {:>10s}  {}".format(
+          "module", "total ms", "own ms", "budget ms", "lazy modules imported"))
+    for module, (directory, budget, lazy) in MODULES.items():
+        runs = [import_times(module, directory) for _ in range(repeat)]
+        total = min(run[module] for run in runs)/1000
+        own = min(run[module] - run.get('numpy', 0) for run in runs)/1000
+        eager = sorted(set(name for run in runs for name in lazy
+                           if name in run))
+        over = own > budget or eager
+        failed = failed or over
+        print("{:<16s} {:10.1f} {:10.1f} {:10.1f}  {}{}".format(
+              module, total, own, budget, ', '.join(eager) or '-',
+              '  REGRESSION' if over else ''))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the table formatting and export, the phasor rendering
+and the page interleaving, with JSON results that can be compared.
+
+Scenarios (n = number of cells, arrows or pages):
+    tabular_print_n     Tabular.print of n cells with mixed magnitudes
+    tabular_cells_n     tupel2Tabularcell cell by cell, up to 10^5 cells
+    tabular_switch_n    Tabular.switchAlignment
+    latex_write_n       LatexTabular.write to a file
+    phasor_draw_n       Phasor.save of n arrows as PNG, one patch per arrow
+    phasor_batched_n    the same with batched drawing
+    duplex_merge_n      duplex.merge of two scans of n pages
+    duplex_stream_n     duplex.interleave of the same scans
+
+Every scenario runs 'repeat' times for the best wall time and once more
+under tracemalloc for the peak memory. Scenarios whose dependencies are
+missing are skipped.
+
+usage: python Benchmarks/bench_suite.py run [-o FILE] [-k TEXT] [--repeat N]
+                                            [--quick]
+       python Benchmarks/bench_suite.py compare BASE NEW [--threshold 0.1]
+                                                [--min-time 0.001]
+"""
+
+import os
+import sys
+import io
+import gc
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'LatexInterface'))
+sys.path.insert(0, os.path.join(HERE, '..', 'Utilities'))
+
+import numpy as np
+from bench_cell_renderer import make_cells
+
+TABLE_CELLS = (10, 1000, 100000, 1000000)
+ARROWS = (10, 100, 1000, 10000)
+PAGES = (300,)
+CELLWISE_MAX = 100000      # the cell by cell loop is slow
+QUICK = {'cells': 10000, 'arrows': 1000, 'pages': 100}
+
+### Scenarios ##################################################################
+
+def table_scenarios(n_cells):
+    import LatexInterface as li
+
+    n_col = min(n_cells, 10)
+    n_row = n_cells//n_col
+    values, uncertainty = make_cells(n_row*n_col)
+    values = values.reshape(n_row, n_col)
+    uncertainty = uncertainty.reshape(n_row, n_col)
+    cells = list(zip(values.ravel().tolist(), uncertainty.ravel().tolist()))
+
+    def setup():
+        return li.LatexTabular.fromArrays(values, uncertainty)
+
+    def write(table):
+        with tempfile.TemporaryDirectory() as tmp:
+            table.write(os.path.join(tmp, 'table.tex'))
+
+    def cellwise(table):
+        for cell in cells:
+            table.tupel2Tabularcell(cell, 16, ',', ' +- ')
+
+    cases = {
+        'tabular_print_%d' % n_cells:
+            (setup, lambda table: table.print(file = io.StringIO())),
+        'tabular_cells_%d' % n_cells: (setup, cellwise),
+        'tabular_switch_%d' % n_cells:
+            (setup, lambda table: table.switchAlignment()),
+        'latex_write_%d' % n_cells: (setup, write),
+        }
+    if n_cells > CELLWISE_MAX:
+        del cases['tabular_cells_%d' % n_cells]
+    return cases
+
+def phasor_scenarios(n_arrows):
+    import matplotlib
+    matplotlib.use('Agg')
+    import phasor
+
+    rng = np.random.default_rng(0)
+    z = rng.normal(size = n_arrows) + 1j*rng.normal(size = n_arrows)
+    labels = ['$U_{%d}$' % k for k in range(n_arrows)]
+
+    def setup():
+        ph = phasor.Phasor(show = False, latex_interpreter = False)
+        ph.add_voltages(z, 'C0', labels, fills = z.real > 0)
+        return ph
+
+    def save(batched):
+        def run(ph):
+            with tempfile.TemporaryDirectory() as tmp:
+                ph.save(os.path.join(tmp, 'phasor.png'), batched = batched)
+        return run
+
+    return {'phasor_draw_%d' % n_arrows: (setup, save(False)),
+            'phasor_batched_%d' % n_arrows: (setup, save(True))}
+
+def duplex_scenarios(n_pages):
+    import duplex
+    import PyPDF2
+    from bench_duplex import synthetic_scan
+    if int(PyPDF2.__version__.split('.')[0]) >= 3:
+        raise ImportError('duplex needs PyPDF2 < 3, found '
+                          + PyPDF2.__version__)
+
+    # removed with the last scenario of the group that references it
+    tmp = tempfile.TemporaryDirectory()
+    front = os.path.join(tmp.name, 'front.pdf')
+    back = os.path.join(tmp.name, 'back.pdf')
+    synthetic_scan(front, n_pages, 16, 0)
+    synthetic_scan(back, n_pages, 16, 1)
+
+    def run(func):
+        def stack(_):
+            func(front, back, os.path.join(tmp.name, 'stack.pdf'))
+        return stack
+
+    return {'duplex_merge_%d' % n_pages: (lambda: None, run(duplex.merge)),
+            'duplex_stream_%d' % n_pages: (lambda: None,
+                                           run(duplex.interleave))}
+
+def scenarios(quick = False):
+    "yields the scenario groups (name of the group, factory, sizes)"
+    limit = QUICK if quick else {}
+    yield ('tabular', table_scenarios,
+           [n for n in TABLE_CELLS if n <= limit.get('cells', n)])
+    yield ('phasor', phasor_scenarios,
+           [n for n in ARROWS if n <= limit.get('arrows', n)])
+    yield ('duplex', duplex_scenarios,
+           [min(n, limit.get('pages', n)) for n in PAGES])
+
+### Measurement ################################################################
+
+def measure(setup, run, repeat):
+    "best wall time of repeat runs and the peak memory of one traced run"
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+
+    state = setup()
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'time_s': min(times), 'peak_bytes': peak, 'repeat': repeat}
+
+def run_suite(output = None, select = None, repeat = 3, quick = False):
+    results = {}
+    skipped = {}
+    for group, factory, sizes in scenarios(quick):
+        for n in sizes:
+            try:
+                cases = factory(n)
+            except ImportError as e:
+                skipped[group] = str(e)
+                break
+            for name, (setup, run) in cases.items():
+                if select and select not in name:
+                    continue
+                results[name] = measure(setup, run, repeat)
+                print("{:<24s} {:10.4f} s  peak {:10.2f} MiB".format(
+                      name, results[name]['time_s'],
+                      results[name]['peak_bytes']/2**20), flush = True)
+            # drops the last references, removes the files of the scenarios
+            cases = setup = run = None
+    for group, reason in skipped.items():
+        print("skipped {}: {}".format(group, reason))
+
+    report = {'meta': {'python': platform.python_version(),
+                       'numpy': np.__version__,
+                       'platform': platform.platform(),
+                       'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'repeat': repeat, 'quick': quick,
+                       'skipped': skipped},
+              'results': results}
+    if output:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent = 1)
+    return report
+
+def compare(base_file, new_file, threshold = 0.1, min_time = 1e-3):
+    """prints the ratios new/base of the scenarios in both files, returns
+       the number of scenarios slower or larger than 1 + threshold, times
+       below min_time seconds are too noisy to count as slower"""
+    with open(base_file) as file:
+        base = json.load(file)['results']
+    with open(new_file) as file:
+        new = json.load(file)['results']
+
+    regressions = 0
+    print("{:<24s} {:>10s} {:>10s} {:>8s} {:>8s}".format(
+          "scenario", "base s", "new s", "time", "memory"))
+    for name in sorted(set(base) & set(new)):
+        t = new[name]['time_s']/base[name]['time_s']
+        m = new[name]['peak_bytes']/max(base[name]['peak_bytes'], 1)
+        slower = t > 1 + threshold and new[name]['time_s'] > min_time
+        flag = slower or m > 1 + threshold
+        regressions += flag
+        print("{:<24s} {:10.4f} {:10.4f} {:7.2f}x {:7.2f}x{}".format(
+              name, base[name]['time_s'], new[name]['time_s'], t, m,
+              '  REGRESSION' if flag else ''))
+    for name in sorted(set(base) ^ set(new)):
+        print("{:<24s} only in {}".format(
+              name, 'base' if name in base else 'new'))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    run = commands.add_parser('run', help = 'run the scenarios')
+    run.add_argument('-o', '--output', help = 'JSON file of the results')
+    run.add_argument('-k', dest = 'select',
+                     help = 'only scenarios whose name contains TEXT')
+    run.add_argument('--repeat', type = int, default = 3)
+    run.add_argument('--quick', action = 'store_true',
+                     help = 'only the small sizes')
+    comp = commands.add_parser('compare', help = 'compare two result files')
+    comp.add_argument('base')
+    comp.add_argument('new')
+    comp.add_argument('--threshold', type = float, default = 0.1,
+                      help = 'tolerated relative increase, default 0.1')
+    comp.add_argument('--min-time', type = float, default = 1e-3,
+                      help = 'shorter times are not compared, default 1 ms')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_suite(args.output, args.select, args.repeat, args.quick)
+        return 0
+    return 1 if compare(args.base, args.new, args.threshold,
+                         args.min_time) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,12 +6,154 @@
 
 ### Import module and from modules #############################################
 import numpy as np
-import subprocess
+import itertools
+import collections
+import time
 import os
+import io
+import sys
+import json
+import functools
+import threading
+# subprocess, tempfile, hashlib, shutil, concurrent.futures, csv, zipfile and
+# struct are only needed for previews, batch export and file formats, they
+# are imported by the functions that use them to keep the import fast
 ################################################################################
 
-# path of pdflatex exe on Pc
+# path of pdflatex exe on Pc, used if there is no pdflatex on the PATH
 dir_pdf_latex = r'C:/texlive/2018/bin/win32/pdflatex'
+# directory of compiled previews and precompiled preambles, None for the
+# directory 'LatexInterface_preview' in the temporary directory of the system
+dir_preview_cache = None
+
+# output of 'pdflatex --version' per executable, see _pdflatex_version()
+_PDFLATEX_VERSIONS = {}
+
+# preamble of preview documents
+_PREVIEW_PREAMBLE = ( "\\documentclass[11pt]{scrartcl} \n" +\
+                      "\\usepackage[utf8]{inputenc} \n" +\
+                      "\\usepackage[german]{babel} \n" +\
+                      "\\usepackage[T1]{fontenc} \n" +\
+                      "\\usepackage{float} \n \n" )
+
+# powers of ten exactly as python evaluates 10**k and 10**(-k). They are used
+# to reproduce the rounding of Tabular.tupel2Tabularcell in vectorized form.
+_POW10 = np.array([float(10**k) for k in range(309)])
+_NEG_POW10 = np.array([10**(-k) for k in range(325)])
+
+### Instrumentation ############################################################
+
+# hooks f(stage, seconds, counts) that are called after each instrumented
+# stage, see addStageHook(). The stages are only timed while there are hooks.
+_STAGE_HOOKS = []
+# stages running at the moment in each thread as attribute 'stages', nested
+# calls of a stage are part of the outer call and not reported on their own
+_running = threading.local()
+
+def addStageHook(hook):
+    """addStageHook(hook)
+    Registers hook to be called after each call of an instrumented stage as
+    hook(stage, seconds, counts). counts is a dict like {'cells': 100} or
+    {'bytes': 2048}, empty if the stage counts nothing but calls. The stages
+    are:
+        'validate'  input parse of _InputParseTabular
+        'format'    formatting of numeric cells (tupel2Tabularcell,
+                    arrays2Tabularcells)
+        'write'     writing a tabular to its file (.write(), writeStream())
+                    or the tables to the preview document, building
+                    strings like .tableEnvironment() is not counted
+        'pdflatex'  pdflatex runs of the previews
+    Without hooks the stages cost one extra function call. Hooks are per
+    process, the workers of writeMany() are not instrumented.
+    OUTPUT:
+        hook        the given hook, to remove it with removeStageHook()
+    """
+    _STAGE_HOOKS.append(hook)
+    return hook
+
+def removeStageHook(hook):
+    "removeStageHook(hook): unregisters a hook of addStageHook()"
+    _STAGE_HOOKS.remove(hook)
+
+def _stage(name, count = None):
+    """decorator that reports the calls of the decorated function as stage
+    name to the hooks. count(result, *args, **kwargs) returns the counts of
+    a call."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _STAGE_HOOKS:
+                return func(*args, **kwargs)
+            running = getattr(_running, 'stages', None)
+            if running is None:
+                running = _running.stages = set()
+            if name in running:
+                return func(*args, **kwargs)
+            running.add(name)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                running.discard(name)
+            seconds = time.perf_counter() - start
+            counts = count(result, *args, **kwargs) if count else {}
+            for hook in list(_STAGE_HOOKS):
+                hook(name, seconds, counts)
+            return result
+        return wrapper
+    return decorator
+
+class StageTotals:
+    """StageTotals()
+    Stage hook that sums up calls, counts and wall time per stage. Used as
+    context manager it is registered on enter and removed on exit:
+
+        with StageTotals() as totals:
+            table.write('table.tex')
+            table.preview()
+        totals.dump()
+    """
+
+    def __init__(this):
+        this.totals = collections.OrderedDict()
+
+    def __call__(this, stage, seconds, counts):
+        total = this.totals.get(stage)
+        if total is None:
+            total = this.totals[stage] = collections.Counter()
+        total['calls'] += 1
+        total['seconds'] += seconds
+        total.update(counts)
+
+    def __enter__(this):
+        return addStageHook(this)
+
+    def __exit__(this, *exc_info):
+        removeStageHook(this)
+
+    def reset(this):
+        this.totals.clear()
+
+    def dump(this, file = None):
+        """.dump(file = None)
+        prints calls, cells formatted, bytes written and wall time per
+        stage to file, default sys.stdout"""
+        lines = ["{:<10s} {:>10s} {:>12s} {:>12s} {:>10s}".format(
+                 "stage", "calls", "cells", "bytes", "seconds")]
+        for stage, total in this.totals.items():
+            lines.append("{:<10s} {:10d} {:12d} {:12d} {:10.4f}".format(
+                         stage, total['calls'], total['cells'],
+                         total['bytes'], total['seconds']))
+        print("\n".join(lines), file = file)
+
+def _count_cells(cells, *args, **kwargs):
+    "counts of the stage 'format'"
+    return {'cells': cells.size if isinstance(cells, np.ndarray) else 1}
+
+def _count_bytes(text, file, *args, **kwargs):
+    "counts of the stage 'write'"
+    encoding = getattr(file, 'encoding', None) or 'utf8'
+    return {'bytes': len(text.encode(encoding, 'replace'))}
 
 ### Define Classes #############################################################
 class Tabular:
@@ -34,50 +176,197 @@ class Tabular:
                                                      alignment)
 
         ## Setup tablular content from input data as horizontal table ##
-        data = []; # init list
-        # create list of (value, uncertaity) tuples and collect
-        # them in nested list.
-        for val, unc in zip(values, uncertainty):
-            if not any(unc):
-                unc = [0]*len(val)
-            row = [(v,u) for v, u in zip(val, unc)]
-            row = row + [()]*(n_col - len(row)) # fill up with empty tupels
-            data.append(row)
+        # values, uncertainties and strings are stored in columnar arrays,
+        # short rows are filled up with empty cells
+        data = _ColumnarData(n_row, n_col)
+        for idx_row, (val, unc) in enumerate(zip(values, uncertainty)):
+            data.set_row(idx_row, _line2arrays(val, unc, n_col))
+
+        this._setup(data, alignment)
+
+    @classmethod
+    def fromArrays(cls, values, uncertainty = None, alignment = 'horizontal'):
+        """Tabular.fromArrays(values, uncertainty = None,
+                              alignment = 'horizontal')
+        Fast constructor for tabulars whose data already sits in
+        numpy.ndarrays. Shape and dtype are validated once for the whole
+        array and the arrays are copied into the storage of the tabular
+        without touching single cells.
+
+        INPUT:
+        - required:
+            values      <ndarray> (n,m) : numeric 2-D array of values
+        - optional:
+            uncertainty <ndarray> (n,m) : numeric 2-D array of uncertainties
+                                          of same shape as values. None for
+                                          values without uncertainty or if
+                                          values is an Uncertain.
+             alignment  <str>           : 'horizontal' or 'vertical'
+        """
+        if isinstance(values, Uncertain) and uncertainty is None:
+            values, uncertainty = values.value, values.sigma
+
+        ## Input parse ##
+        values, uncertainty = _InputParseTabular.test_fromArrays(values,
+                                                                 uncertainty,
+                                                                 alignment)
+
+        ## Setup tablular content ##
+        n_row, n_col = values.shape
+        data = _ColumnarData(n_row, n_col)
+        data.values[...] = values
+        if uncertainty is not None:
+            data.uncertainty[...] = uncertainty
+        data.valid[...] = True
+
+        table = cls.__new__(cls)
+        table._setup(data, alignment)
+        return table
+
+    @classmethod
+    def fromColumns(cls, columns, names = None, alignment = 'horizontal'):
+        """Tabular.fromColumns(columns, names = None,
+                               alignment = 'horizontal')
+        Creates a tabular from columns of the same length, e.g. quantities
+        derived with Uncertain arithmetic.
+
+        INPUT:
+        - required:
+            columns     <list> (m,)     : 1-D Uncertain arrays or numeric
+                                          numpy.ndarrays (no uncertainty)
+        - optional:
+            names       <list> (m,)     : column names
+             alignment  <str>           : 'horizontal' or 'vertical'
+        """
+        ## Input parse ##
+        _InputParseTabular.test_fromColumns(columns, alignment)
+
+        columns = [c if isinstance(c, Uncertain) else Uncertain(c)
+                   for c in columns]
+        values = np.stack([c.value for c in columns], axis = 1)
+        uncertainty = np.stack([c.sigma for c in columns], axis = 1)
+        table = cls.fromArrays(values, uncertainty, 'horizontal')
+        if names is not None:
+            table.editColNames(names)
+        if alignment == 'vertical':
+            table.switchAlignment()
+        return table
+
+    def _setup(this, data, alignment = 'horizontal'):
+        """._setup(data, alignment = 'horizontal')
+        Sets the attributes of a new tabular with content data, an instance
+        of _ColumnarData, in horizontal alignment"""
+        n_row, n_col = data.n_row, data.n_col
+        this._data = data
 
         ## public attributes ##
-        this.content = data
         this.row_names = [str(int+1) for int in range(n_row)]
         this.col_names = [str(int+1) for int in range(n_col)]
         this.row_col_name = " "
 
         ## private format attributes ##
-        this.n_col = n_col              # number of columns
-        this.n_row = n_row              # number of rows
         this.disp_col_names = False     # flag: if true -> print col_names
         this.disp_row_names = False     # flag: if true -> print row_names
         this.cell_space = 16            # number of signs used for each tabular
                                         # entry when printed
+        this._renderer = _CellRenderer() # cache of compiled cell formats
+        this._render_cache = collections.OrderedDict() # rendered cells and
+                                        # rows per format, see _renderedRows
 
         # change alignment of tabular if nescessary
         if alignment == 'vertical':
             this.switchAlignment()
 
+    def __getstate__(this):
+        # compiled formats and rendered cells are not pickled, they are
+        # rebuilt on use
+        state = this.__dict__.copy()
+        del state['_renderer']
+        del state['_render_cache']
+        return state
+
+    def __setstate__(this, state):
+        this.__dict__.update(state)
+        this._renderer = _CellRenderer()
+        this._render_cache = collections.OrderedDict()
+
     def switchAlignment(this):
         """.switchAlignment()
         Changes the Table from vertical to horizontal alignment
         and vic versa"""
         # Swap columnnames and rownames of tablular
         this.row_names, this.col_names = this.col_names, this.row_names
-        # transpose entries of tabular
-        data = [[]]*this.n_col # initiate data list
-        for idx_col in range(this.n_col):
-            col = []
-            for idx_row in range(this.n_row):
-                col.append(this.content[idx_row][idx_col])
-            data[idx_col] = col
-        this.content = data
-        # swap number of columns and rows
-        this.n_row, this.n_col = this.n_col, this.n_row
+        # transpose entries of tabular (zero-copy view of the arrays), this
+        # also swaps the number of columns and rows
+        this._data.transpose()
+        for cache in this._render_cache.values():
+            cache.transpose()
+
+    @property
+    def n_row(this):
+        "number of rows"
+        return this._data.n_row
+
+    @property
+    def n_col(this):
+        "number of columns"
+        return this._data.n_col
+
+    @property
+    def content(this):
+        """.content
+        Tuple of the tabular entries, row by row. Numeric cells are
+        (value, uncertainty) tuples, empty cells are empty tuples and text
+        cells are strings. It is built from the columnar storage and can not
+        be changed in place, assign a nested list to .content instead."""
+        data = this._data
+        content = []
+        for vals, uncs, valid, strs in zip(data.values.tolist(),
+                                           data.uncertainty.tolist(),
+                                           data.valid.tolist(),
+                                           data.strings.tolist()):
+            row = []
+            for v, u, ok, s in zip(vals, uncs, valid, strs):
+                if s is not None:
+                    row.append(s)
+                elif ok:
+                    row.append((v, u))
+                else:
+                    row.append(())
+            content.append(tuple(row))
+        return tuple(content)
+
+    @content.setter
+    def content(this, content):
+        """.content = content
+        Replaces all cells by a nested list of cells as returned by
+        .content, short rows are filled up with empty cells. Names are kept
+        if the number of rows respectively columns does not change."""
+        n_row = len(content)
+        n_col = max([len(row) for row in content], default = 0)
+        data = _ColumnarData(n_row, n_col)
+        values, uncertainty = data.values, data.uncertainty
+        valid, strings = data.valid, data.strings
+        for idx_row, row in enumerate(content):
+            for idx_col, cell in enumerate(row):
+                if type(cell) is str:
+                    strings[idx_row, idx_col] = cell
+                elif cell:
+                    if len(cell) != 2:
+                        msg = ( "Cells of \"content\" have to be "
+                                "(value, uncertainty) tuples, empty tuples "
+                                "or strings")
+                        raise DimensionError(msg)
+                    values[idx_row, idx_col] = cell[0]
+                    uncertainty[idx_row, idx_col] = cell[1]
+                    valid[idx_row, idx_col] = True
+
+        this._data = data
+        this._render_cache.clear()
+        if n_row != len(this.row_names):
+            this.row_names = [str(idx+1) for idx in range(n_row)]
+        if n_col != len(this.col_names):
+            this.col_names = [str(idx+1) for idx in range(n_col)]
 
     def config(this, disp_col_names = False, disp_row_names = False ):
         """.config(disp_col_names = False, disp_row_names = False ):
@@ -103,10 +392,7 @@ class Tabular:
             this.col_names[0:n_names] = names
 
         # update cell space
-        cs = this.cell_space
-        for name in names:
-            cs = max(cs, len(name))
-        this.cell_space = cs
+        this._setCellSpace(names)
 
         # display column names in printed table
         this.disp_col_names = True
@@ -124,23 +410,33 @@ class Tabular:
             this.row_names[0:n_names] = names
 
         # update cell space
+        this._setCellSpace(names)
+
+        # display row names in printed Table
+        this.disp_row_names = True
+
+    def _setCellSpace(this, names):
+        """widens the cell space to the longest of the given names. Rendered
+        cells of the old width are dropped."""
         cs = this.cell_space
         for name in names:
             cs = max(cs, len(name))
+        if cs != this.cell_space:
+            this._render_cache.clear()
         this.cell_space = cs
 
-        # display row names in printed Table
-        this.disp_row_names = True
-
-    def print(this, cs=0, delimiter = ',', pm = ' +- '):
-        """.print( cs=0, delimiter = ',', pm = ' +- ')
-        Used to print the tabular in the consol
+    def print(this, cs=0, delimiter = ',', pm = ' +- ', file = None):
+        """.print( cs=0, delimiter = ',', pm = ' +- ', file = None)
+        Used to print the tabular in the consol. The whole tabular is
+        assembled in one string and written at once.
         INPUT:
         optional:
             cs          <int> (1,): Value to overwrite cell space property
             delimiter   <str> (1,): Value to set delimiter sign for numbers
             pm          <str> (n,): Value to set plusminus sign between value
-                                    and uncertainty """
+                                    and uncertainty
+            file        <file>    : file object to print to instead of
+                                    sys.stdout """
         ## Input parse ##
         # recalculate cs
         if not cs : #check if cs is 0, empty or false
@@ -148,33 +444,81 @@ class Tabular:
         if  cs%2 != 0:
             cs = cs+1
 
-        ## Print head line with column names ##
-        if this.disp_col_names:
-            row_str = " | "
-            if this.disp_row_names:
-                row_str = row_str + this.str2Tabularcell(this.row_col_name, cs)
-                row_str = row_str + " | "
-            for col_name in this.col_names:
-                cell = this.str2Tabularcell(col_name, cs)
-                row_str = row_str + cell + " | "
-            print(row_str)
-
-        ## Print table body ##
-        for row, row_name in zip(this.content , this.row_names):
-            row_str = " | "
+        lines = []
 
+        ## Head line with column names ##
+        if this.disp_col_names:
+            cells = [this.str2Tabularcell(col_name, cs)
+                     for col_name in this.col_names]
             if this.disp_row_names:
-                cell = this.str2Tabularcell(row_name, cs)
-                row_str = row_str + cell + " | "
-
-            for item in row:
-                if type(item) is tuple:
-                    cell = this.tupel2Tabularcell(item, cs, delimiter, pm)
-                elif type(item) is str:
-                    cell = this.str2Tabularcell(item, cs)
-                row_str = row_str + cell + " | "
-            print(row_str)
-
+                cells.insert(0, this.str2Tabularcell(this.row_col_name, cs))
+            lines.append(" | " + " | ".join(cells) + " | ")
+
+        ## Table body ##
+        # only cells changed since the last call are rendered again
+        rows = this._renderedRows(cs, delimiter, pm)
+        if this.disp_row_names:
+            lines.extend(" | " + this.str2Tabularcell(row_name, cs) + " | " +
+                         row + " | "
+                         for row_name, row in zip(this.row_names, rows))
+        else:
+            lines.extend(" | " + row + " | " for row in rows)
+
+        ## Print all lines at once ##
+        if lines:
+            print("\n".join(lines), file = file)
+
+    def _renderedRows(this, cs, delimiter, pm, latex = False):
+        """._renderedRows(cs, delimiter, pm, latex = False)
+        Returns the rendered rows of the table body without row names, the
+        cells joined by ' | ' for .print() or by ' & ' for LaTeX. Rendered
+        cells and rows are cached per format, only cells that changed since
+        the last call with the same format are rendered again."""
+        key = (cs, delimiter, pm, latex)
+        caches = this._render_cache
+        if key in caches:
+            caches.move_to_end(key)
+            cache = caches[key]
+        else:
+            cache = _RenderCache(this.n_row, this.n_col)
+            caches[key] = cache
+            if len(caches) > 4:
+                caches.popitem(last = False)
+
+        ## render cells that are not cached ##
+        cells = cache.cells
+        idx = np.nonzero(np.equal(cells, None))
+        if idx[0].size:
+            changed = np.unique(idx[0]).tolist()
+            if idx[0].size == cells.size:
+                # all cells keep their 2-D layout, so the rounding of the
+                # uncertainties is memoized per column or row
+                idx = np.s_[:, :]
+            data = this._data
+            new_cells = this.arrays2Tabularcells(data.values[idx],
+                                                 data.uncertainty[idx],
+                                                 cs, delimiter, pm,
+                                                 data.valid[idx])
+            if latex:
+                new_cells = "$ " + new_cells + " $"
+            text = data.strings[idx]
+            is_text = np.not_equal(text, None)
+            text_cs = cs + 4 if latex else cs
+            new_cells[is_text] = [this.str2Tabularcell(item, text_cs)
+                                  for item in text[is_text]]
+            cells[idx] = new_cells
+            for idx_row in changed:
+                cache.rows[idx_row] = None
+
+        ## join rows that are not cached ##
+        sep = " & " if latex else " | "
+        rows = cache.rows
+        for idx_row, row in enumerate(rows):
+            if row is None:
+                rows[idx_row] = sep.join(cells[idx_row].tolist())
+        return rows
+
+    @_stage('format', _count_cells)
     def tupel2Tabularcell(this, in_tuple, cs=10, delimiter = '.', pm = ' +- '):
         """.tupel2Tabularcell(in_tupel, cs=10, delimiter = '.', pm = ' +- '))
         Converts a (Value, Uncertaitny) Tupel into a string and also adjust
@@ -193,7 +537,7 @@ class Tabular:
         OUTPUT:
             cell        <str> (cs,)  string of the form 'value +- uncertainty'
         """
-        len_pm = len(pm)/2
+        render = this._renderer.cell
 
         if in_tuple: #check if not emptyS
             val = in_tuple[0]
@@ -206,8 +550,7 @@ class Tabular:
             cell = " " * cs
             # cell = " "*int(cs/2-1) + "  " + " "*int(cs/2-1)
         elif unc == 0:
-            cell_str = "{:^" + str(cs) + ".6g}"
-            cell = cell_str.format(val)
+            cell = render(cs, delimiter, pm, None)(val, unc)
         elif int(unc) == 0:
             while int(unc) == 0:
                 sig_d = sig_d + 1
@@ -215,10 +558,7 @@ class Tabular:
             unc = round(unc)*10**(-sig_d)
             if unc*10**sig_d == 10 :
                 sig_d = sig_d - 1
-            unc_str = "{:<" + str(int(cs/2)-int(np.ceil(len_pm))) +".1g}"
-            val_str = ("{:>" + str(int(cs/2)-int(np.floor(len_pm))) + "." +
-                       str(sig_d) + "f}")
-            cell = val_str.format(val) + pm + unc_str.format(unc)
+            cell = render(cs, delimiter, pm, sig_d)(val, unc)
         else:
             while int(unc) != 0:
                 sig_d = sig_d + 1
@@ -229,88 +569,350 @@ class Tabular:
                 sig_d = sig_d + 1
             val = round(val/10**(sig_d-1) ) * 10**(sig_d-1)
             val = int(val)
-            unc_str = "{:<" + str(int(cs/2)-int(np.ceil(len_pm))) +"d}"
-            val_str = "{:>" + str(int(cs/2)-int(np.floor(len_pm))) +"d}"
-            cell = val_str.format(val) + pm + unc_str.format(unc)
+            cell = render(cs, delimiter, pm, 'int')(val, unc)
 
-        cell = cell.replace('.', delimiter)
         return cell
 
+    @_stage('format', _count_cells)
+    def arrays2Tabularcells(this, values, uncertainty, cs=10, delimiter = '.',
+                            pm = ' +- ', valid = None):
+        """.arrays2Tabularcells(values, uncertainty, cs=10, delimiter = '.',
+                                pm = ' +- ', valid = None)
+        Batch version of .tupel2Tabularcell(). All (Value, Uncertainty) pairs
+        of the given arrays are rounded in one vectorized pass. The returned
+        strings are identical to the ones of the cell-wise method.
+        INPUT:
+        required:
+            values      <ndarray> (n,m)  values of the cells
+            uncertainty <ndarray> (n,m)  uncertainties of the cells
+        optional:
+            cs          <int> (1,)       number of signs used for each cell
+            delimiter   <str> (1,)       string used as komma-dot
+            pm          <str> (n)        string use as plusminus sign between
+                                         value and uncertainty
+            valid       <ndarray> (n,m)  bool mask, False marks empty cells
+        OUTPUT:
+            cells       <ndarray> (n,m)  object array of cell strings
+        """
+        val, unc = np.broadcast_arrays(np.asarray(values, dtype=float),
+                                       np.asarray(uncertainty, dtype=float))
+        shape = val.shape
+        val = val.ravel()
+        unc = unc.ravel()
+        if valid is None:
+            valid = np.ones(val.size, dtype=bool)
+        else:
+            valid = np.broadcast_to(valid, shape).ravel()
+
+        render = this._renderer.cell
+        cells = np.full(val.size, " " * cs, dtype=object)
+
+        groups, other = _round_cells(val, unc, valid, this._renderer, shape)
+        for idx, sig_d, vals, uncs in groups:
+            fmt = render(cs, delimiter, pm, sig_d)
+            cells[idx] = [fmt(v, u) for v, u in zip(vals, uncs)]
+
+        # cells that are out of range of the vectorized rounding (non finite
+        # numbers or extreme magnitudes) are handled cell-wise
+        for i in other:
+            cells[i] = this.tupel2Tabularcell((val[i].item(), unc[i].item()),
+                                              cs, delimiter, pm)
+
+        return cells.reshape(shape)
+
     def str2Tabularcell(this, in_str, cs):
         """.str2Tabularcell(in_str, cs)
         expands a given string with blanks so it has the size of an
         tabularcell string given by cs.
         """
-        cell_str = "{:^" +str(cs)+ "s}"
-        cell = cell_str.format(in_str)
+        cell = this._renderer.text(cs)(in_str)
 
         return cell
 
+    def roundingCacheInfo(this):
+        """.roundingCacheInfo()
+        Statistics of the memoized rounding of uncertainties when cells
+        are rendered or exported (.print(), .write(), .writeCSV(), ...).
+        Cells whose uncertainty was rounded before are hits and skip the
+        search of the significant digits, see _CellRenderer.rounding().
+        OUTPUT:
+            info    <dict>  'hits', 'misses' (cells searched), 'size'
+                            (number of memoized uncertainties) and
+                            'hit_rate'
+        """
+        return this._renderer.roundingInfo()
+
     def addColumn(this, values, uncertainty = [], pos = [], name = 'new_col'):
 
+        if isinstance(values, Uncertain):
+            values, uncertainty = values.value, values.sigma
+
         ## Input parse ##
-        _InputParseTabular.test_addData( values, uncertainty,
-                                        pos, this.n_row, name)
+        _InputParseTabular.test_addData( values, uncertainty, pos,
+                                        this.n_col + 1, this.n_row, name)
         ## add data ##
-        if not uncertainty:
-            uncertainty = [0]*len(values)
-
-        data = []
-        for val, unc in zip(values, uncertainty):
-            if type(val) is str:
-                data.append(val)
-            else:
-                data.append((val, unc))
-
         if not pos:
             pos = this.n_col
         else:
             pos = pos - 1
 
-        for row, item in zip(this.content, data):
-            row.insert(pos, item)
+        # missing cells at the end of the column are left empty
+        this._data.insert_col(pos, _line2arrays(values, uncertainty,
+                                                this.n_row))
+        for cache in this._render_cache.values():
+            cache.insert_col(pos)
 
         ## add Column name ##
         this.col_names.insert(pos, name)
 
-        ## adjust number of columns ##
-        this.n_col = this.n_col + 1
-
         ## adjust cell space variable
-        this.cell_space = max(this.cell_space, len(name))
+        this._setCellSpace([name])
 
     def addRow(this, values, uncertainty = [], pos = [], name = 'new_row'):
 
+        if isinstance(values, Uncertain):
+            values, uncertainty = values.value, values.sigma
+
         ## Input parse ##
-        _InputParseTabular.test_addData(values, uncertainty,
-                                        pos, this.n_col, name)
+        _InputParseTabular.test_addData(values, uncertainty, pos,
+                                        this.n_row + 1, this.n_col, name)
 
         ## add data ##
-        if not uncertainty:
-            uncertainty = [0]*len(values)
-
-        data = []
-        for val, unc in zip(values, uncertainty):
-            if type(val) is str:
-                data.append(val)
-            else:
-                data.append((val, unc))
-
         if not pos:
             pos = this.n_row
         else:
             pos = pos - 1
 
-        this.content.insert(pos, data)
+        # missing cells at the end of the row are left empty
+        this._data.insert_row(pos, _line2arrays(values, uncertainty,
+                                                this.n_col))
+        for cache in this._render_cache.values():
+            cache.insert_row(pos)
 
-        ## add Column name ##
+        ## add Row name ##
         this.row_names.insert(pos, name)
 
-        ## adjust number of columns ##
-        this.n_row = this.n_row + 1
-
         ## adjust cell space variable
-        this.cell_space = max(this.cell_space, len(name))
+        this._setCellSpace([name])
+
+    ## Export ##
+    def writeCSV(this, filename, mode = "w", encoding = 'utf8'):
+        """.writeCSV(filename, mode = "w", encoding = 'utf8')
+        Writes the tabular as CSV file. The first column holds the row
+        names, each column of the tabular becomes a value column and an
+        uncertainty column ('<name> unc'). Numbers are rounded with the
+        significant digits of .tupel2Tabularcell(), text cells have an empty
+        uncertainty and empty cells are empty. All rows are written in one
+        batch. A text cell holding an empty string is written like an empty
+        cell, .readCSV() reads it as empty cell (unlike .readJSON() and
+        .readNPZ(), which keep it)."""
+        import csv
+
+        val_str, unc_str = this._exportStrings()
+        header = [this.row_col_name]
+        for col_name in this.col_names:
+            header = header + [col_name, col_name + " unc"]
+
+        rows = np.empty((this.n_row, 1 + 2*this.n_col), dtype = object)
+        rows[:, 0] = this.row_names
+        rows[:, 1::2] = val_str
+        rows[:, 2::2] = unc_str
+
+        with open(filename, mode, encoding = encoding, newline = '') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows.tolist())
+
+    @classmethod
+    def readCSV(cls, filename, encoding = 'utf8'):
+        """Tabular.readCSV(filename, encoding = 'utf8')
+        Creates a tabular from a file written by .writeCSV(). The rounded
+        numbers are read as they are, cells without value and uncertainty
+        are empty cells, also if they were text cells with an empty string."""
+        import csv
+
+        with open(filename, encoding = encoding, newline = '') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            rows = list(reader)
+
+        n_row = len(rows)
+        n_col = (len(header) - 1)//2
+        cells = np.array(rows, dtype = object).reshape(n_row, 1 + 2*n_col)
+        val_str = cells[:, 1::2]
+        unc_str = cells[:, 2::2]
+        numeric = unc_str != ''
+        text = ~numeric & (val_str != '')
+
+        data = _ColumnarData(n_row, n_col)
+        data.values[numeric] = val_str[numeric].astype(float)
+        data.uncertainty[numeric] = unc_str[numeric].astype(float)
+        data.valid[...] = numeric
+        data.strings[text] = val_str[text]
+
+        table = cls.__new__(cls)
+        table._setup(data)
+        table._setMeta({'row_col_name': header[0],
+                        'col_names': header[1::2],
+                        'row_names': cells[:, 0].tolist()})
+        return table
+
+    def writeJSON(this, filename, mode = "w", encoding = 'utf8'):
+        """.writeJSON(filename, mode = "w", encoding = 'utf8')
+        Writes the tabular as JSON lines. The first line holds the names and
+        display settings, each further line one row:
+            {"name": <row name>, "cells": [<cell>, ...]}
+        with [value, uncertainty] for numbers, rounded with the significant
+        digits of .tupel2Tabularcell(), a string for text cells and null
+        for empty cells. Non finite numbers are written as Infinity,
+        -Infinity and NaN like json.dumps() does, which json.loads() reads."""
+        val_str, unc_str = this._exportStrings()
+        valid = this._data.valid
+        cells = np.full((this.n_row, this.n_col), "null", dtype = object)
+        cells[valid] = "[" + val_str[valid] + ", " + unc_str[valid] + "]"
+        text = this._data.strings != None
+        cells[text] = [json.dumps(item) for item in val_str[text]]
+
+        meta = this._meta()
+        del meta['row_names']
+        lines = [json.dumps(meta)]
+        for row_name, row in zip(this.row_names, cells.tolist()):
+            lines.append('{"name": ' + json.dumps(row_name) +
+                         ', "cells": [' + ", ".join(row) + ']}')
+
+        with open(filename, mode, encoding = encoding) as file:
+            file.write("\n".join(lines) + "\n")
+
+    @classmethod
+    def readJSON(cls, filename, encoding = 'utf8'):
+        """Tabular.readJSON(filename, encoding = 'utf8')
+        Creates a tabular from a file written by .writeJSON(). The rounded
+        numbers are read as they are."""
+        with open(filename, encoding = encoding) as file:
+            meta = json.loads(file.readline())
+            rows = [json.loads(line) for line in file if line.strip()]
+
+        n_col = len(meta['col_names'])
+        data = _ColumnarData(len(rows), n_col)
+        values, uncertainty = data.values, data.uncertainty
+        valid, strings = data.valid, data.strings
+        for idx_row, row in enumerate(rows):
+            for idx_col, cell in enumerate(row['cells']):
+                if type(cell) is str:
+                    strings[idx_row, idx_col] = cell
+                elif cell is not None:
+                    values[idx_row, idx_col] = cell[0]
+                    uncertainty[idx_row, idx_col] = cell[1]
+                    valid[idx_row, idx_col] = True
+
+        meta['row_names'] = [row['name'] for row in rows]
+        table = cls.__new__(cls)
+        table._setup(data)
+        table._setMeta(meta)
+        return table
+
+    def writeNPZ(this, filename):
+        """.writeNPZ(filename)
+        Writes the raw values and uncertainties of the tabular, the cell
+        masks, text cells and names to an uncompressed .npz file, which can
+        be memory-mapped by Tabular.readNPZ()."""
+        data = this._data
+        text = data.strings != None
+        arrays = {'values': data.values,
+                  'uncertainty': data.uncertainty,
+                  'valid': data.valid,
+                  'text': text,
+                  'meta': np.array(json.dumps(this._meta()))}
+        if text.any():
+            arrays['strings'] = np.where(text, data.strings, '').astype(str)
+        np.savez(_npz_name(filename), **arrays)
+
+    @classmethod
+    def readNPZ(cls, filename, mmap = True):
+        """Tabular.readNPZ(filename, mmap = True)
+        Creates a tabular from a file written by .writeNPZ(). With mmap the
+        values, uncertainties and the validity mask are memory-mapped
+        (copy on write) instead of being read into memory."""
+        filename = _npz_name(filename)
+        with np.load(filename) as npz:
+            meta = json.loads(str(npz['meta']))
+            text = npz['text']
+            strings = npz['strings'] if 'strings' in npz.files else None
+            if not mmap:
+                arrays = [npz[name] for name in ('values', 'uncertainty',
+                                                 'valid')]
+        if mmap:
+            arrays = [_npz_memmap(filename, name) for name in ('values',
+                                                              'uncertainty',
+                                                              'valid')]
+
+        text_cells = np.full(text.shape, None, dtype = object)
+        if strings is not None:
+            text_cells[text] = strings[text]
+        data = _ColumnarData.fromBuffers(*arrays, text_cells)
+
+        table = cls.__new__(cls)
+        table._setup(data)
+        table._setMeta(meta)
+        return table
+
+    def _exportStrings(this):
+        """._exportStrings()
+        Returns the cells as strings for the export formats. Numeric cells
+        are rounded with the significant digits of .tupel2Tabularcell() but
+        not padded, text cells are returned as they are, empty cells are
+        None.
+        OUTPUT:
+            val_str <ndarray> (n_row, n_col)  values and text cells
+            unc_str <ndarray> (n_row, n_col)  uncertainties
+        """
+        data = this._data
+        shape = (this.n_row, this.n_col)
+        val = data.values.ravel()
+        unc = data.uncertainty.ravel()
+        val_str = np.full(val.size, None, dtype = object)
+        unc_str = np.full(val.size, None, dtype = object)
+
+        groups, other = _round_cells(val, unc, data.valid.ravel(),
+                                     this._renderer, shape)
+        for idx, sig_d, vals, uncs in groups:
+            val_fmt, unc_fmt = _export_formats(sig_d)
+            val_str[idx] = [val_fmt(v) for v in vals]
+            unc_str[idx] = [unc_fmt(u) for u in uncs]
+        # numbers out of range of the rounding are exported unrounded,
+        # non finite values as json.dumps writes them, not as 'inf', 'nan'
+        for i in other:
+            val_str[i] = json.dumps(val[i].item())
+            unc_str[i] = json.dumps(unc[i].item())
+        for i in np.flatnonzero(data.valid.ravel() & ~np.isfinite(val)):
+            val_str[i] = json.dumps(val[i].item())
+
+        val_str = val_str.reshape(shape)
+        text = data.strings != None
+        val_str[text] = data.strings[text]
+        return val_str, unc_str.reshape(shape)
+
+    def _meta(this):
+        "returns names and display settings of the tabular as dict"
+        return {'row_col_name': this.row_col_name,
+                'col_names': list(this.col_names),
+                'row_names': list(this.row_names),
+                'disp_col_names': this.disp_col_names,
+                'disp_row_names': this.disp_row_names,
+                'cell_space': this.cell_space}
+
+    def _setMeta(this, meta):
+        """sets names and display settings from a dict of ._meta(), the cell
+        space defaults to the longest name"""
+        this.row_col_name = meta['row_col_name']
+        this.col_names = list(meta['col_names'])
+        this.row_names = list(meta['row_names'])
+        this.disp_col_names = meta.get('disp_col_names', False)
+        this.disp_row_names = meta.get('disp_row_names', False)
+        cs = this.cell_space
+        for name in [this.row_col_name] + this.col_names + this.row_names:
+            cs = max(cs, len(name))
+        this.cell_space = meta.get('cell_space', cs)
 
 class LatexTabular(Tabular):
 
@@ -323,80 +925,1097 @@ class LatexTabular(Tabular):
         this.__write_tabular_to_file(file, delimiter)
         file.close()
 
-    def preview(this, delimiter = ','):
-
-        cwd = os.getcwd()
-        file_path = os.path.join(cwd, "tmp_tabular_preview.tex")
-        file = open(file_path, "w+", encoding = 'utf8')
-        file.write( "\\documentclass[11pt]{scrartcl} \n" +\
-                    "\\usepackage[utf8]{inputenc} \n" +\
-                    "\\usepackage[german]{babel} \n" +\
-                    "\\usepackage[T1]{fontenc} \n" +\
-                    "\\usepackage{float} \n \n" )
-        file.write( "\\begin{document} \n \n")
+    @classmethod
+    def writeStream(cls, filename, rows, col_names = None, row_names = None,
+                    n_col = 0, cs = 0, chunk_size = 1000, mode = "w+",
+                    delimiter = ',', encoding = 'utf8'):
+        """LatexTabular.writeStream(filename, rows, col_names = None,
+                                    row_names = None, n_col = 0, cs = 0,
+                                    chunk_size = 1000, mode = "w+",
+                                    delimiter = ',', encoding = 'utf8')
+        Writes a tabular whose rows are produced by an iterable, for instance
+        a generator yielding results of a running simulation. Rows are
+        formatted and flushed to the file in chunks of chunk_size rows, so
+        the memory needed does not depend on the number of rows. The output
+        is the same as the one of .write() for a tabular with these rows.
+        INPUT:
+        required:
+            filename    <str>              path of the output file
+            rows        <iterable>         (values, uncertainty) pairs, one
+                                           per row. uncertainty may be an
+                                           empty list or None.
+        optional:
+            col_names   <list> (n_col,)    column names, like .editColNames()
+            row_names   <iterable>         row names, consumed with the rows,
+                                           one per row
+            n_col       <int> (1,)         number of columns. Defaults to the
+                                           length of the first row.
+            cs          <int> (1,)         cell space. Defaults to the cell
+                                           space resulting from col_names.
+                                           Row names are not known in advance
+                                           and do not widen the cells.
+            chunk_size  <int> (1,)         number of rows formatted at once
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            msg = ( "Input \"rows\" must contain at least one row!")
+            raise ValueError(msg)
 
+        ## set up header from a tabular with one empty row ##
+        if not n_col:
+            n_col = len(first[0])
+        _InputParseTabular.test_writeStream(n_col, chunk_size)
+        table = cls.__new__(cls)
+        table._setup(_ColumnarData(chunk_size, n_col))
+        if col_names:
+            table.editColNames(col_names)
+        table.disp_row_names = row_names is not None
+        if cs:
+            table.cell_space = cs
+        cs = table.cell_space
+        if row_names is None:
+            row_names = (str(idx+1) for idx in itertools.count())
+        row_names = iter(row_names)
+
+        ## format and write the rows chunk by chunk ##
+        data = table._data
+        rows = itertools.chain([first], rows)
+        with open(filename, mode, encoding = encoding) as file:
+            _write_text(file, table.__tabular_head(cs))
+            sep = ""
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                data.n_row = len(chunk)
+                table._render_cache.clear()
+                for idx_row, (val, unc) in enumerate(chunk):
+                    if len(val) > n_col:
+                        msg = ( "Input \"rows\" contains a row with more "
+                                "than " + str(n_col) + " elements!")
+                        raise DimensionError(msg)
+                    unc = [] if unc is None else unc
+                    if len(unc) not in (0, len(val)):
+                        msg = ( "Input \"rows\" contains a row whose "
+                                "uncertainty is not of the same size as its "
+                                "values or empty!")
+                        raise DimensionError(msg)
+                    data.set_row(idx_row, _line2arrays(val, unc, n_col))
+                table.row_names = list(itertools.islice(row_names,
+                                                        len(chunk)))
+                if len(table.row_names) < len(chunk):
+                    msg = ( "Input \"row_names\" has less names than "
+                            "\"rows\" has rows!")
+                    raise DimensionError(msg)
+                rows_str = " \\\\ \n".join(table.__tabular_rows(cs, delimiter))
+                _write_text(file, sep + rows_str)
+                file.flush()
+                sep = " \\\\ \n"
+
+    def preview(this, delimiter = ',', view = True):
+        """.preview(delimiter = ',', view = True)
+        Compiles the tabular in a standalone document with pdflatex and
+        opens the PDF. See compileTables() for the compilation and caching.
+        OUTPUT:
+            pdf_path    <str>   path of the compiled PDF in the cache
+        """
+        pdf_path = compileTables([this], delimiter)
+        if view:
+            _open_pdf(pdf_path)
+        return pdf_path
+
+    def tableEnvironment(this, delimiter = ','):
+        """.tableEnvironment(delimiter = ',')
+        Returns the tabular wrapped in a LaTeX table environment as it is
+        used by .preview()"""
+        n_col = this.n_col if this.disp_row_names else this.n_col - 1
+        file = io.StringIO()
         file.write( "\\begin{table} \n" + \
                     "\\caption{Preview of created Table} \n" + \
                     "\\centering")
         file.write( "\\begin{tabular}")
-        n_col = this.n_col if this.disp_row_names else this.n_col - 1
         file.write( "{" + "c|"*(n_col) +"c} \\hline \\hline \n")
 
-        this.__write_tabular_to_file(file, delimiter)
+        file.write(this.__tabular_text(delimiter))
 
         file.write( "\\\\ \\hline \\hline \n")
         file.write( "\\end{tabular} \n" +\
                     "\\end{table} \n \n"   )
-
-        file.write("\\end{document}")
-        file.close()
-
-        subprocess.check_call([dir_pdf_latex, file_path])
-        pdf_file_path = os.path.join(cwd, 'tmp_tabular_preview.pdf' )
-        os.remove(os.path.join(cwd, "tmp_tabular_preview.tex"))
-        os.remove(os.path.join(cwd, "tmp_tabular_preview.aux"))
-        os.remove(os.path.join(cwd, "tmp_tabular_preview.log"))
-        pdf_view = subprocess.Popen(['tmp_tabular_preview.pdf'],shell=True)
-        pdf_view.wait()
+        return file.getvalue()
 
     def __write_tabular_to_file(this, file, delimiter = ','):
 
-        cs = this.cell_space
-        pm = r"~\pm~"
+        # assemble the whole tabular and write it at once
+        _write_text(file, this.__tabular_text(delimiter))
 
-        if this.disp_col_names:
-            if this.disp_row_names:
-                row_col_name = this.str2Tabularcell(this.row_col_name, cs)
-                file.write(row_col_name + " & ")
-            for idx_col, col_name in enumerate(this.col_names):
-                cell = this.str2Tabularcell(col_name, cs)
-                cell = "  " + cell + "  "
-                file.write(cell)
-                if idx_col < this.n_col - 1:
-                    file.write(" & ")
-                else:
-                    file.write(" \\\\ \\hline \n")
-        for idx_row, row in enumerate(this.content):
-
-            if this.disp_row_names:
-                row_name = this.row_names[idx_row]
-                cell = this.str2Tabularcell(row_name, cs)
-                cell = cell + " & "
-                file.write(cell)
-
-            for idx_item, item in enumerate(row):
-
-                if type(item) is tuple:
-                    cell = this.tupel2Tabularcell(item, cs, delimiter, pm)
-                    cell = "$ " + cell +" $"
-                elif type(item) is str:
-                    cell = this.str2Tabularcell(item, cs+4)
-                file.write(cell)
+    def __tabular_text(this, delimiter):
+        "returns the tabular as it is written to a file"
+        cs = this.cell_space
+        rows = this.__tabular_rows(cs, delimiter)
+        return this.__tabular_head(cs) + " \\\\ \n".join(rows)
+
+    def __tabular_head(this, cs):
+        """returns the line with the column names, empty if they are not
+        displayed"""
+        if not this.disp_col_names:
+            return ""
+
+        cells = ["  " + this.str2Tabularcell(col_name, cs) + "  "
+                 for col_name in this.col_names]
+        head = " & ".join(cells) + " \\\\ \\hline \n"
+        if this.disp_row_names:
+            head = this.str2Tabularcell(this.row_col_name, cs) + " & " + head
+        return head
+
+    def __tabular_rows(this, cs, delimiter):
+        """returns a list with one string per row of the tabular, without
+        the line break at the end of the row"""
+        rows = this._renderedRows(cs, delimiter, r"~\pm~", latex = True)
+        if this.disp_row_names:
+            rows = [this.str2Tabularcell(row_name, cs) + " & " + row
+                    for row_name, row in zip(this.row_names, rows)]
+        return rows
+
+### Preview Compilation ######################################################
+
+def compileTables(tables, delimiter = ',', cache_dir = None,
+                  precompile = True):
+    """compileTables(tables, delimiter = ',', cache_dir = None,
+                     precompile = True)
+    Compiles all given tables in one document with a single pdflatex run.
+    pdflatex is searched on the PATH (falling back to dir_pdf_latex) and
+    runs in a private temporary directory, so concurrent compilations do
+    not collide. The PDF is cached under the hash of the generated LaTeX
+    code, unchanged tables are not compiled again.
+    INPUT:
+    required:
+        tables      <list> (n,)   instances of LatexTabular
+    optional:
+        delimiter   <str> (1,)    komma-dot of the numbers
+        cache_dir   <str> (1,)    cache directory, default dir_preview_cache
+        precompile  <bool> (1,)   dump the preamble to a format file once and
+                                  start pdflatex from it, which saves loading
+                                  the packages on each run. There is one
+                                  format per pdflatex executable and version,
+                                  if it fails anyway the document is compiled
+                                  again with the full preamble.
+    OUTPUT:
+        pdf_path    <str>         path of the compiled PDF in the cache
+    """
+    import hashlib
+    import subprocess
+    import tempfile
+
+    ## Input parse ##
+    _InputParseTabular.test_tables(tables)
+
+    if cache_dir is None:
+        cache_dir = dir_preview_cache
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(),
+                                 'LatexInterface_preview')
+    os.makedirs(cache_dir, exist_ok = True)
+
+    body = ( "\\begin{document} \n \n" +
+             "".join(table.tableEnvironment(delimiter) for table in tables) +
+             "\\end{document}")
+    tex_hash = hashlib.sha256((_PREVIEW_PREAMBLE + body).encode('utf8'))
+    pdf_path = os.path.join(cache_dir, tex_hash.hexdigest() + ".pdf")
+    if os.path.isfile(pdf_path):
+        return pdf_path
+
+    pdflatex = _find_pdflatex()
+    fmt = None
+    if precompile:
+        try:
+            fmt = _precompile_preamble(pdflatex, cache_dir)
+        except subprocess.CalledProcessError:
+            fmt = None # some distributions can not dump, use full preamble
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            _compile_preview(pdflatex, body, tmp_dir, cache_dir, fmt)
+        except subprocess.CalledProcessError:
+            if fmt is None:
+                raise
+            # the format may not load, e.g. if it was dumped by another
+            # version of pdflatex, compile once more with the full preamble
+            _compile_preview(pdflatex, body, tmp_dir, cache_dir, None)
+        os.replace(os.path.join(tmp_dir, "tabular_preview.pdf"), pdf_path)
+
+    return pdf_path
+
+def previewTables(tables, delimiter = ','):
+    """previewTables(tables, delimiter = ',')
+    Compiles all given tables in one document (see compileTables()) and
+    opens the PDF.
+    OUTPUT:
+        pdf_path    <str>   path of the compiled PDF in the cache
+    """
+    pdf_path = compileTables(tables, delimiter)
+    _open_pdf(pdf_path)
+    return pdf_path
+
+def _find_pdflatex():
+    "returns the pdflatex executable from the PATH or dir_pdf_latex"
+    import shutil
+    pdflatex = shutil.which('pdflatex') or shutil.which(dir_pdf_latex)
+    if pdflatex is None:
+        msg = ( "pdflatex was neither found on the PATH nor at "
+                "dir_pdf_latex = '" + dir_pdf_latex + "'")
+        raise FileNotFoundError(msg)
+    return pdflatex
+
+def _compile_preview(pdflatex, body, tmp_dir, cache_dir, fmt = None):
+    """writes the preview document with the given body to tmp_dir and
+    compiles it, starting pdflatex from the format fmt in cache_dir or from
+    the full preamble if fmt is None"""
+    tex_path = os.path.join(tmp_dir, "tabular_preview.tex")
+    with open(tex_path, "w", encoding = 'utf8') as file:
+        if fmt is None:
+            file.write(_PREVIEW_PREAMBLE)
+        _write_text(file, body)
+
+    cmd = [pdflatex, "-interaction=nonstopmode", "-halt-on-error"]
+    env = None
+    if fmt is not None:
+        cmd.append("-fmt=" + fmt)
+        env = dict(os.environ)
+        env['TEXFORMATS'] = cache_dir + os.pathsep + \
+                            env.get('TEXFORMATS', '')
+    _run_pdflatex(cmd + ["tabular_preview.tex"], tmp_dir, env)
+
+def _pdflatex_version(pdflatex):
+    """returns the output of 'pdflatex --version', empty if it fails. It is
+    read once per executable and process."""
+    import subprocess
+
+    if pdflatex not in _PDFLATEX_VERSIONS:
+        try:
+            version = subprocess.run([pdflatex, "--version"], check = True,
+                                     stdout = subprocess.PIPE,
+                                     stderr = subprocess.DEVNULL).stdout
+        except (OSError, subprocess.CalledProcessError):
+            version = b""
+        _PDFLATEX_VERSIONS[pdflatex] = version.decode('utf8', 'replace')
+    return _PDFLATEX_VERSIONS[pdflatex]
+
+def _precompile_preamble(pdflatex, cache_dir):
+    """dumps the preview preamble into a format file in cache_dir, once per
+    preamble and pdflatex executable and version, and returns the name of
+    the format"""
+    import hashlib
+    import tempfile
+
+    key = "\n".join([_PREVIEW_PREAMBLE, os.path.realpath(pdflatex),
+                     _pdflatex_version(pdflatex)])
+    fmt = "preamble_" + hashlib.sha256(key.encode('utf8')).hexdigest()[:16]
+    if os.path.isfile(os.path.join(cache_dir, fmt + ".fmt")):
+        return fmt
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with open(os.path.join(tmp_dir, fmt + ".tex"), "w",
+                  encoding = 'utf8') as file:
+            file.write(_PREVIEW_PREAMBLE)
+        _run_pdflatex([pdflatex, "-ini", "-interaction=nonstopmode",
+                       "-jobname=" + fmt, "&pdflatex " + fmt + ".tex\\dump"],
+                      tmp_dir)
+        os.replace(os.path.join(tmp_dir, fmt + ".fmt"),
+                   os.path.join(cache_dir, fmt + ".fmt"))
+    return fmt
+
+@_stage('pdflatex')
+def _run_pdflatex(cmd, cwd, env = None):
+    "runs pdflatex in cwd, raises subprocess.CalledProcessError if it fails"
+    import subprocess
+    subprocess.run(cmd, cwd = cwd, env = env, check = True,
+                   stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+
+@_stage('write', _count_bytes)
+def _write_text(file, text):
+    "writes text to file and returns it"
+    file.write(text)
+    return text
+
+def _open_pdf(pdf_path):
+    "opens a PDF in the default viewer without waiting for it"
+    import subprocess
+    if sys.platform.startswith('win'):
+        os.startfile(pdf_path)
+    elif sys.platform == 'darwin':
+        subprocess.Popen(['open', pdf_path])
+    else:
+        subprocess.Popen(['xdg-open', pdf_path])
+
+### Batch Export #############################################################
+
+def writeMany(tables, filenames, workers = None, mode = "w+", delimiter = ',',
+              encoding = 'utf8'):
+    """writeMany(tables, filenames, workers = None, mode = "w+",
+                 delimiter = ',', encoding = 'utf8')
+    Writes many independent LatexTabular instances to their files in a pool
+    of worker processes. The tables are sent to the workers as pickled
+    column arrays. Each file is formatted and written by one worker, so the
+    output is the same as the one of LatexTabular.write().
+    INPUT:
+    required:
+        tables      <list> (n,)   instances of LatexTabular
+        filenames   <list> (n,)   paths of the output files
+    optional:
+        workers     <int> (1,)    number of processes. Defaults to the number
+                                  of CPUs, 1 writes in this process.
+    OUTPUT:
+        timing      <list> (n,)   (filename, seconds) per table, seconds is the
+                                  time needed by the worker to write the table
+    """
+    import concurrent.futures
+
+    ## Input parse ##
+    _InputParseTabular.test_writeMany(tables, filenames)
+
+    jobs = [(table, filename, mode, delimiter, encoding)
+            for table, filename in zip(tables, filenames)]
+    if workers == 1:
+        times = [_write_job(job) for job in jobs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            times = list(pool.map(_write_job, jobs))
+
+    return list(zip(filenames, times))
+
+def _write_job(job):
+    "worker of writeMany: writes one table and returns the time it took"
+    table, filename, mode, delimiter, encoding = job
+    start = time.perf_counter()
+    table.write(filename, mode, delimiter, encoding)
+    return time.perf_counter() - start
+
+### Export Helpers ###########################################################
+
+def _export_formats(sig_d):
+    """returns the (value, uncertainty) formats of the export files for the
+    format key sig_d of _CellRenderer.cell"""
+    if sig_d is None:
+        return "{:.6g}".format, str
+    elif sig_d == 'int':
+        return str, str
+    return ("{:." + str(sig_d) + "f}").format, "{:.1g}".format
+
+def _npz_name(filename):
+    "adds the suffix .npz to a path without it, as np.savez does"
+    if isinstance(filename, (str, os.PathLike)):
+        filename = os.fspath(filename)
+        if not filename.endswith('.npz'):
+            filename = filename + '.npz'
+    return filename
+
+def _npz_memmap(filename, name):
+    """_npz_memmap(filename, name)
+    Memory-maps the array 'name' of an uncompressed .npz file (copy on
+    write). The array data of a stored zip member is contiguous in the file
+    behind the local file header and the .npy header."""
+    import struct
+    import zipfile
+
+    with zipfile.ZipFile(filename) as archive:
+        info = archive.getinfo(name + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        msg = ( "Array '" + name + "' of '" + str(filename) + "' is "
+                "compressed and can not be memory-mapped")
+        raise ValueError(msg)
+
+    with open(filename, 'rb') as file:
+        file.seek(info.header_offset)
+        local_header = file.read(30)
+        n_name, n_extra = struct.unpack('<HH', local_header[26:30])
+        file.seek(info.header_offset + 30 + n_name + n_extra)
+        version = np.lib.format.read_magic(file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_1_0(file)
+        else:
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_2_0(file)
+        offset = file.tell()
+
+    if np.prod(shape) == 0:
+        return np.empty(shape, dtype = dtype)
+    return np.memmap(filename, dtype = dtype, mode = 'c', offset = offset,
+                     shape = shape, order = 'F' if fortran_order else 'C')
+
+### Cell Rendering ###########################################################
+
+class _CellRenderer:
+    """ Cache of the compiled formats of the cells of a
+    Latex_Interface.Tabular. A format is compiled once per
+    (cs, delimiter, pm, sig_d) and kept in a bounded LRU cache, so
+    rendering a cell is a single call of a bound str.format method.
+
+    sig_d is the number of decimals of a value with uncertainty. None marks
+    cells without uncertainty (value with maximal 6 significant digits) and
+    'int' marks cells whose value and uncertainty are integers. """
+
+    def __init__(this, maxsize = 128, maxrounding = 4096):
+        this.maxsize = maxsize
+        this._cache = collections.OrderedDict()
+        # rounding of the uncertainties, see .rounding()
+        this.maxrounding = maxrounding
+        this._rounding = {}
+        this.rounding_hits = 0
+        this.rounding_misses = 0
+
+    def cell(this, cs, delimiter, pm, sig_d):
+        """.cell(cs, delimiter, pm, sig_d)
+        returns a function f(value, uncertainty) that renders a numeric cell
+        exactly like Tabular.tupel2Tabularcell"""
+        key = (cs, delimiter, pm, sig_d)
+        try:
+            this._cache.move_to_end(key)
+            return this._cache[key]
+        except KeyError:
+            pass
+
+        # padding widths of value and uncertainty around pm
+        w_unc = str(int(cs/2) - (len(pm) + 1)//2)
+        w_val = str(int(cs/2) - len(pm)//2)
+        pm_str = pm.replace('{', '{{').replace('}', '}}')
+        if sig_d is None:
+            cell_str = "{0:^" + str(cs) + ".6g}"
+        elif sig_d == 'int':
+            cell_str = "{0:>" + w_val + "d}" + pm_str + "{1:<" + w_unc + "d}"
+        else:
+            cell_str = ("{0:>" + w_val + "." + str(sig_d) + "f}" + pm_str +
+                        "{1:<" + w_unc + ".1g}")
+
+        fmt = cell_str.format
+        if delimiter != '.':
+            fmt = lambda val, unc, fmt = fmt: fmt(val, unc).replace('.',
+                                                                    delimiter)
+        return this._store(key, fmt)
+
+    def text(this, cs):
+        """.text(cs)
+        returns a function f(str) that centers a string in a cell of size cs
+        like Tabular.str2Tabularcell"""
+        key = (cs, None, None, 'str')
+        try:
+            this._cache.move_to_end(key)
+            return this._cache[key]
+        except KeyError:
+            pass
+        return this._store(key, ("{:^" + str(cs) + "s}").format)
+
+    def _store(this, key, fmt):
+        "adds fmt to the cache and evicts the least recently used format"
+        this._cache[key] = fmt
+        if len(this._cache) > this.maxsize:
+            this._cache.popitem(last = False)
+        return fmt
+
+    def rounding(this, unc, search, idx = None, n_col = None):
+        """.rounding(unc, search, idx = None, n_col = None)
+        returns search(unc) for the uncertainties unc of one branch of
+        _round_cells, search is _round_small_unc or _round_large_unc.
+        If a group of cells has at most _ROUNDING_DISTINCT distinct
+        uncertainties, as a column with a constant uncertainty like the
+        resolution of an instrument, the digits are searched once per
+        distinct value and memoized for later renders. The whole branch is
+        such a group, or with the flat indices idx of the cells in a tabular
+        of n_col columns, its columns and then its rows. Columns and rows are
+        chosen from a sample of the cells, so branches without such groups
+        are searched at once at next to no extra cost. The memo is cleared
+        when it holds maxrounding uncertainties."""
+        if not unc.size:
+            return search(unc)
+        rounded = this._memoized(unc, search)
+        if rounded is not None:
+            return rounded
+        if idx is None:
+            this.rounding_misses += unc.size
+            return search(unc)
+
+        # blocks of adjacent cells at a stride, a plain stride could miss
+        # columns whose number shares a divisor with it
+        width = min(n_col, _ROUNDING_LINES)
+        step = max(unc.size*width//_ROUNDING_SAMPLE, width)
+        sample = np.add.outer(np.arange(0, unc.size, step),
+                              np.arange(width)).ravel()
+        sample = sample[sample < unc.size]
+        todo = None
+        for line in (np.remainder, np.floor_divide):
+            if todo is not None:
+                sample = sample[todo[sample]]
+            candidates = _few_distinct(line(idx[sample], n_col), unc[sample])
+            if not 0 < len(candidates) <= _ROUNDING_LINES:
+                continue
+            labels = line(idx, n_col)
+            for label in candidates:
+                in_line = labels == label
+                if todo is not None:
+                    in_line &= todo
+                cells = np.flatnonzero(in_line)
+                rounded = this._memoized(unc[cells], search)
+                if rounded is None:
+                    continue
+                if todo is None:
+                    todo = np.ones(unc.size, dtype = bool)
+                    sig_d = np.zeros(unc.size, dtype = np.intp)
+                    unc_r = np.zeros(unc.size)
+                sig_d[cells], unc_r[cells] = rounded
+                todo[cells] = False
+
+        if todo is None:
+            this.rounding_misses += unc.size
+            return search(unc)
+        rest = np.flatnonzero(todo)
+        this.rounding_misses += rest.size
+        if rest.size:
+            sig_d[rest], unc_r[rest] = search(unc[rest])
+        return sig_d, unc_r
+
+    def _memoized(this, unc, search):
+        """rounding of unc through the memo if a sample of unc has at most
+        _ROUNDING_DISTINCT values that cover unc, else None"""
+        sample = np.unique(unc[::max(unc.size//64, 1)]).tolist()
+        if len(sample) > _ROUNDING_DISTINCT:
+            return None
+        inverse = np.zeros(unc.size, dtype = np.intp)
+        covered = 0
+        for j, u in enumerate(sample):
+            is_u = unc == u
+            inverse[is_u] = j
+            covered += np.count_nonzero(is_u)
+        if covered != unc.size:
+            return None
+
+        memo = this._rounding
+        missing = [u for u in sample if u not in memo]
+        if missing:
+            if len(memo) + len(missing) > this.maxrounding:
+                memo.clear()
+            sig_d, unc_r = search(np.array(missing))
+            memo.update(zip(missing, zip(sig_d.tolist(), unc_r.tolist())))
+        rounded = [memo[u] for u in sample]
+        this.rounding_misses += len(missing)
+        this.rounding_hits += unc.size - len(missing)
+        return (np.array([d for d, _ in rounded])[inverse],
+                np.array([r for _, r in rounded])[inverse])
+
+    def roundingInfo(this):
+        "hits, misses, size and hit rate of the memo of .rounding()"
+        cells = this.rounding_hits + this.rounding_misses
+        return {'hits': this.rounding_hits,
+                'misses': this.rounding_misses,
+                'size': len(this._rounding),
+                'hit_rate': this.rounding_hits/cells if cells else 0.}
+
+# maximal number of distinct uncertainties in one group of cells that are
+# rounded with the memo of _CellRenderer.rounding
+_ROUNDING_DISTINCT = 8
+# maximal number of columns or rows of a branch of _round_cells that
+# _CellRenderer.rounding checks one by one and the size of the sample it
+# chooses them from. A column or row is checked if each of its distinct
+# uncertainties is _ROUNDING_REPEAT times in the sample on average.
+_ROUNDING_LINES = 64
+_ROUNDING_SAMPLE = 4096
+_ROUNDING_REPEAT = 4
+
+def _few_distinct(labels, unc):
+    """labels of the sampled cells with at most _ROUNDING_DISTINCT distinct
+    uncertainties unc, that are repeated _ROUNDING_REPEAT times"""
+    order = np.lexsort((unc, labels))
+    labels, unc = labels[order], unc[order]
+    first = np.ones(labels.size, dtype = bool)
+    first[1:] = labels[1:] != labels[:-1]
+    new = first.copy()
+    new[1:] |= unc[1:] != unc[:-1]
+    starts = np.flatnonzero(first)
+    n_cells = np.diff(np.append(starts, labels.size))
+    n_distinct = np.add.reduceat(new, starts) if starts.size else n_cells
+    few = (n_distinct <= _ROUNDING_DISTINCT) & \
+          (n_distinct*_ROUNDING_REPEAT <= n_cells)
+    return labels[starts[few]].tolist()
+
+class _RenderCache:
+    """ Rendered cells and rows of a Latex_Interface.Tabular for one format.
+    Cells that are None are rendered again on the next use, rows that are
+    None are joined again from their cells. Adding rows or columns and
+    transposing keep the rendered cells. """
+
+    def __init__(this, n_row, n_col):
+        this.cells = np.full((n_row, n_col), None, dtype = object)
+        this.rows = [None]*n_row
+
+    def insert_row(this, pos):
+        this.cells = np.insert(this.cells, pos, None, axis = 0)
+        this.rows.insert(pos, None)
+
+    def insert_col(this, pos):
+        this.cells = np.insert(this.cells, pos, None, axis = 1)
+        this.rows = [None]*len(this.rows)
+
+    def transpose(this):
+        this.cells = this.cells.T
+        this.rows = [None]*this.cells.shape[0]
+
+### Columnar Storage #########################################################
+
+class _ColumnarData:
+    """ Array backed storage of the cells of a Latex_Interface.Tabular.
+    Values, uncertainties and a validity mask are held in 2-D arrays, text
+    cells in a separate object array. The arrays are buffers with spare
+    capacity that grow geometrically, so adding rows and columns is
+    amortized, and transposing them is a zero-copy view. """
+
+    # buffer attributes and the value of an empty cell
+    _buffers = (('_val', float, 0.0), ('_unc', float, 0.0),
+                ('_valid', bool, False), ('_str', object, None))
+
+    def __init__(this, n_row, n_col):
+        this.n_row = n_row
+        this.n_col = n_col
+        for attr, dtype, fill in this._buffers:
+            setattr(this, attr, np.full((n_row, n_col), fill, dtype = dtype))
+
+    @classmethod
+    def fromBuffers(cls, values, uncertainty, valid, strings):
+        "creates a storage that uses the given 2-D arrays without copying"
+        data = cls.__new__(cls)
+        data.n_row, data.n_col = values.shape
+        data._val, data._unc, data._valid, data._str = (values, uncertainty,
+                                                        valid, strings)
+        return data
+
+    @property
+    def values(this):
+        return this._val[:this.n_row, :this.n_col]
+
+    @property
+    def uncertainty(this):
+        return this._unc[:this.n_row, :this.n_col]
+
+    @property
+    def valid(this):
+        return this._valid[:this.n_row, :this.n_col]
+
+    @property
+    def strings(this):
+        return this._str[:this.n_row, :this.n_col]
+
+    def __getstate__(this):
+        # pickle only the used part of the buffers as contiguous arrays, the
+        # text cells only if there are any
+        state = {'n_row': this.n_row, 'n_col': this.n_col}
+        for attr, _, fill in this._buffers:
+            buf = np.ascontiguousarray(getattr(this, attr)[:this.n_row,
+                                                           :this.n_col])
+            state[attr] = buf
+        if not np.any(state['_str'] != None):
+            state['_str'] = None
+        return state
+
+    def __setstate__(this, state):
+        this.__dict__.update(state)
+        if this._str is None:
+            this._str = np.full((this.n_row, this.n_col), None, dtype = object)
+
+    def transpose(this):
+        "swaps rows and columns without copying the buffers"
+        for attr, _, _ in this._buffers:
+            setattr(this, attr, getattr(this, attr).T)
+        this.n_row, this.n_col = this.n_col, this.n_row
 
-                if idx_item < this.n_col - 1:
-                    file.write(" & ")
-                elif idx_row < this.n_row -1:
-                    file.write(" \\\\ \n")
+    def set_row(this, idx, line):
+        "overwrites row idx with the (values, uncertainty, valid, strings) line"
+        for (attr, _, _), item in zip(this._buffers, line):
+            getattr(this, attr)[idx, :this.n_col] = item
+
+    def insert_row(this, pos, line):
+        "inserts the (values, uncertainty, valid, strings) line as row pos"
+        this._reserve(this.n_row + 1, this.n_col)
+        n_row, n_col = this.n_row, this.n_col
+        for (attr, _, _), item in zip(this._buffers, line):
+            buf = getattr(this, attr)
+            buf[pos+1:n_row+1, :n_col] = buf[pos:n_row, :n_col]
+            buf[pos, :n_col] = item
+        this.n_row = n_row + 1
+
+    def insert_col(this, pos, line):
+        "inserts the (values, uncertainty, valid, strings) line as column pos"
+        this._reserve(this.n_row, this.n_col + 1)
+        n_row, n_col = this.n_row, this.n_col
+        for (attr, _, _), item in zip(this._buffers, line):
+            buf = getattr(this, attr)
+            buf[:n_row, pos+1:n_col+1] = buf[:n_row, pos:n_col]
+            buf[:n_row, pos] = item
+        this.n_col = n_col + 1
+
+    def _reserve(this, n_row, n_col):
+        "grows the buffers (at least doubling) to hold n_row x n_col cells"
+        cap_row, cap_col = this._val.shape
+        if n_row <= cap_row and n_col <= cap_col:
+            return
+        if n_row > cap_row:
+            cap_row = max(n_row, 2*cap_row)
+        if n_col > cap_col:
+            cap_col = max(n_col, 2*cap_col)
+        for attr, dtype, fill in this._buffers:
+            buf = np.full((cap_row, cap_col), fill, dtype = dtype)
+            buf[:this.n_row, :this.n_col] = getattr(this, attr)[:this.n_row,
+                                                                :this.n_col]
+            setattr(this, attr, buf)
+
+def _line2arrays(values, uncertainty, n):
+    """_line2arrays(values, uncertainty, n)
+    Splits one row or column of input data into the arrays of the columnar
+    storage. Strings become text cells, missing uncertainties are 0 and
+    the line is filled up with empty cells to length n.
+    OUTPUT:
+        (values, uncertainty, valid, strings)  <ndarray> (n,) each
+    """
+    n_val = len(values)
+    val = np.zeros(n)
+    unc = np.zeros(n)
+    valid = np.zeros(n, dtype = bool)
+    strs = np.full(n, None, dtype = object)
+
+    if (type(values) is np.ndarray and values.dtype.kind in 'biuf') or \
+            not any(type(v) is str for v in values):
+        val[:n_val] = values
+        valid[:n_val] = True
+    else:
+        for idx, v in enumerate(values):
+            if type(v) is str:
+                strs[idx] = v
+            else:
+                val[idx] = v
+                valid[idx] = True
+
+    if len(uncertainty) != 0 and any(uncertainty):
+        unc[:n_val] = uncertainty
+        unc[:n_val][~valid[:n_val]] = 0
+
+    return val, unc, valid, strs
+
+### Vectorized Rounding ######################################################
+
+def _round_cells(val, unc, valid, renderer = None, shape = None):
+    """_round_cells(val, unc, valid, renderer = None, shape = None)
+    Sorts the cells of the 1-D arrays val and unc into the branches of
+    Tabular.tupel2Tabularcell and rounds them in one vectorized pass per
+    branch. With a _CellRenderer the uncertainties are rounded through its
+    memo, see _CellRenderer.rounding(). shape is the (n_row, n_col) of the
+    tabular the flat arrays come from, its columns and rows are checked
+    for the memo one by one.
+    OUTPUT:
+        groups  <list>     (idx, sig_d, values, uncertainties) per group of
+                           cells that share the format key sig_d of
+                           _CellRenderer.cell. values and uncertainties are
+                           rounded and given as lists ready to be formatted.
+        other   <ndarray>  indices of valid cells out of range of the
+                           vectorized rounding (non finite numbers or
+                           extreme magnitudes)
+    """
+    abs_unc = np.abs(unc)
+    finite = np.isfinite(val) & np.isfinite(unc)
+    zero = valid & (unc == 0)
+    small = valid & finite & (abs_unc < 1) & (abs_unc >= 1e-300) & ~zero
+    large = valid & finite & (abs_unc >= 1) & (abs_unc < 1e21)
+    other = valid & ~(zero | small | large)
+
+    ## no uncertainty: value with maximal 6 significant digits ##
+    idx = np.flatnonzero(zero)
+    groups = [(idx, None, val[idx].tolist(), [0]*len(idx))]
+
+    ## uncertainty smaller than one: round value to decimals ##
+    idx = np.flatnonzero(small)
+    sig_d, unc_r = _rounding(unc[idx], _round_small_unc, renderer, idx, shape)
+    for d in np.unique(sig_d).tolist():
+        sel = sig_d == d
+        groups.append((idx[sel], d, val[idx[sel]].tolist(),
+                       unc_r[sel].tolist()))
+
+    ## uncertainty larger than one: round value to integer digits ##
+    idx = np.flatnonzero(large)
+    sig_d, unc_r = _rounding(unc[idx], _round_large_unc, renderer, idx, shape)
+    val_r = np.round(val[idx] / _POW10[sig_d - 1])
+    for d in np.unique(sig_d).tolist():
+        sel = sig_d == d
+        scale = 10**(d - 1)
+        groups.append((idx[sel], 'int',
+                       [int(v) * scale for v in val_r[sel].tolist()],
+                       [int(u) for u in unc_r[sel].tolist()]))
+
+    return groups, np.flatnonzero(other)
+
+def _rounding(unc, search, renderer, idx, shape):
+    """search(unc), through the memo of the renderer if there is one. idx
+    are the flat indices of unc in a tabular of the given shape."""
+    if renderer is None:
+        return search(unc)
+    if shape is None or len(shape) != 2:
+        return renderer.rounding(unc, search)
+    return renderer.rounding(unc, search, idx, shape[1])
+
+def _round_small_unc(unc):
+    """_round_small_unc(unc)
+    Vectorized rounding of uncertainties with 0 < |unc| < 1 as done in
+    Tabular.tupel2Tabularcell.
+    OUTPUT:
+        sig_d   <ndarray> (n,)  number of decimals to display the value with
+        unc     <ndarray> (n,)  uncertainty rounded to one significant digit
+    """
+    unc = np.array(unc, dtype = float)
+    # exponent from log10, estimated one digit short so that the
+    # remaining digits are always found by the loop below
+    sig_d = np.maximum(-np.floor(np.log10(np.abs(unc))).astype(int) - 1, 0)
+    # scale by repeated multiplication like the cell-wise loop, so that
+    # ties like 0.85 are rounded identically
+    for k in range(sig_d.max(initial = 0)):
+        np.multiply(unc, 10, out = unc, where = sig_d > k)
+    active = np.trunc(unc) == 0
+    while active.any():
+        sig_d = sig_d + active
+        np.multiply(unc, 10, out = unc, where = active)
+        active = np.trunc(unc) == 0
+
+    unc = np.round(unc) * _NEG_POW10[sig_d]
+    sig_d = sig_d - (unc * _POW10[sig_d] == 10)
+    return sig_d, unc
+
+def _round_large_unc(unc):
+    """_round_large_unc(unc)
+    Vectorized rounding of uncertainties with 1 <= |unc| < 1e21 as done in
+    Tabular.tupel2Tabularcell.
+    OUTPUT:
+        sig_d   <ndarray> (n,)  number of integer digits of the uncertainty
+        unc     <ndarray> (n,)  uncertainty rounded to one significant digit
+    """
+    unc = np.array(unc, dtype = float)
+    sig_d = np.maximum(np.floor(np.log10(np.abs(unc))).astype(int), 0)
+    for k in range(sig_d.max(initial = 0)):
+        np.divide(unc, 10, out = unc, where = sig_d > k)
+    active = np.trunc(unc) != 0
+    while active.any():
+        sig_d = sig_d + active
+        np.divide(unc, 10, out = unc, where = active)
+        active = np.trunc(unc) != 0
+
+    unc = np.round(unc*10) * _POW10[sig_d - 1]
+    sig_d = sig_d + (unc * _NEG_POW10[sig_d] == 1)
+    return sig_d, unc
+
+### Uncertain Quantities #####################################################
+
+class Uncertain:
+    """Uncertain(value, sigma = 0)
+    Array of quantities with Gaussian uncertainty: values and standard
+    deviations in numpy.ndarrays of the same shape. The arithmetic
+    operators + - * / ** and the common numpy ufuncs (np.sqrt, np.exp,
+    np.log, np.sin, ...) work element wise on whole arrays and propagate
+    the uncertainty to first order:
+        sigma_f = sqrt( sum_k (df/dx_k * sigma_k)**2 )
+    where x_k are the independent measured quantities, one per element of
+    an Uncertain created from values and sigmas. The contribution of every
+    x_k is kept, also through indexing, so quantities that share a measured
+    quantity are correlated correctly, e.g. x - x, x[:2] - x[0:2] and
+    element 0 of x - x[0] are exact. Plain numbers and arrays are exact.
+
+    Uncertain arrays are a column source of Tabular: Tabular.fromArrays
+    takes a 2-D Uncertain as values, Tabular.fromColumns a list of 1-D
+    ones and addColumn/addRow a 1-D one.
+
+    INPUT:
+    - required:
+        value   <ndarray> (...) : values
+    - optional:
+        sigma   <ndarray> (...) : standard deviations, broadcast to the shape
+                                  of value
+    """
+
+    # numpy calls __array_ufunc__ of this class for mixed operations
+    __array_priority__ = 20
+
+    def __init__(this, value, sigma = 0):
+        this.value = np.asarray(value, dtype = float)
+        this._sigma = np.abs(np.broadcast_to(np.asarray(sigma, dtype = float),
+                                             this.value.shape))
+        # contributions df/dx_k*sigma_k of the independent quantities x_k:
+        # per measured array a list of (elements, contributions), elements
+        # are the flat indices of the x_k in the measured array
+        this._terms = {}
+        if np.any(this._sigma):
+            elements = np.arange(this.value.size).reshape(this.value.shape)
+            this._terms[next(_UNCERTAIN_SOURCES)] = [(elements, this._sigma)]
+
+    @classmethod
+    def _derived(cls, value, terms):
+        "Uncertain with the contributions terms of the independent quantities"
+        quantity = cls.__new__(cls)
+        quantity.value = value
+        quantity._sigma = None
+        quantity._terms = terms
+        return quantity
+
+    @property
+    def sigma(this):
+        if this._sigma is None:
+            total = np.zeros(this.value.shape)
+            for pairs in this._terms.values():
+                for j, (elements, term) in enumerate(pairs):
+                    # contributions of the same x_k are added before they
+                    # are squared, at the first pair that holds the x_k
+                    counted = np.zeros(this.value.shape, dtype = bool)
+                    for other, _ in pairs[:j]:
+                        counted |= other == elements
+                    for other, other_term in pairs[j+1:]:
+                        term = term + np.where(other == elements,
+                                               other_term, 0.)
+                    total = total + np.where(counted, 0., term**2)
+            this._sigma = np.sqrt(total)
+        return this._sigma
+
+    @property
+    def shape(this):
+        return this.value.shape
+
+    def __len__(this):
+        return len(this.value)
+
+    def __getitem__(this, idx):
+        # the selected elements keep their measured quantities
+        return Uncertain._derived(this.value[idx],
+                                  {k: [(elements[idx], term[idx])
+                                       for elements, term in pairs]
+                                   for k, pairs in this._terms.items()})
+
+    def __repr__(this):
+        return "Uncertain(" + repr(this.value) + ", " + repr(this.sigma) + ")"
+
+    ## arithmetic ##
+    def __add__(this, other):
+        return _propagate2(np.add, this, other)
+
+    def __radd__(this, other):
+        return _propagate2(np.add, other, this)
+
+    def __sub__(this, other):
+        return _propagate2(np.subtract, this, other)
+
+    def __rsub__(this, other):
+        return _propagate2(np.subtract, other, this)
+
+    def __mul__(this, other):
+        return _propagate2(np.multiply, this, other)
+
+    def __rmul__(this, other):
+        return _propagate2(np.multiply, other, this)
+
+    def __truediv__(this, other):
+        return _propagate2(np.divide, this, other)
+
+    def __rtruediv__(this, other):
+        return _propagate2(np.divide, other, this)
+
+    def __pow__(this, other):
+        return _propagate2(np.power, this, other)
+
+    def __rpow__(this, other):
+        return _propagate2(np.power, other, this)
+
+    def __neg__(this):
+        return _propagate1(np.negative, this)
+
+    def __pos__(this):
+        return _propagate1(np.positive, this)
+
+    def __abs__(this):
+        return _propagate1(np.absolute, this)
+
+    def __array_ufunc__(this, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        if ufunc in _BINARY_DERIVATIVES and len(inputs) == 2:
+            return _propagate2(ufunc, *inputs)
+        if ufunc in _UNARY_DERIVATIVES and len(inputs) == 1:
+            return _propagate1(ufunc, *inputs)
+        return NotImplemented
+
+# ids of the independent quantities of Uncertain
+_UNCERTAIN_SOURCES = itertools.count()
+
+def _chain(shape, *parts):
+    """contributions of the independent quantities to f of the given shape
+    from the pairs (df/dx, contributions to x) of the arguments x of f"""
+    terms = {}
+    with np.errstate(invalid = 'ignore'):
+        for derivative, x_terms in parts:
+            for k, pairs in x_terms.items():
+                merged = terms.setdefault(k, [])
+                for elements, term in pairs:
+                    # 0 where the term is 0, even if the derivative is not
+                    # finite
+                    term = np.where(term == 0, 0., derivative*term)
+                    term = np.broadcast_to(term, shape)
+                    elements = np.broadcast_to(elements, shape)
+                    # contributions of the same elements are added up
+                    for i, (other, other_term) in enumerate(merged):
+                        if np.array_equal(other, elements):
+                            merged[i] = (other, other_term + term)
+                            break
+                    else:
+                        merged.append((elements, term))
+    return terms
+
+def _propagate1(ufunc, x):
+    "result of the unary ufunc for the Uncertain x"
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        value = ufunc(x.value)
+        derivative = _UNARY_DERIVATIVES[ufunc](x.value, value)
+    return Uncertain._derived(value, _chain(np.shape(value),
+                                            (derivative, x._terms)))
+
+def _propagate2(ufunc, a, b):
+    "result of the binary ufunc for Uncertain or exact operands a and b"
+    a = a if isinstance(a, Uncertain) else Uncertain(a)
+    b = b if isinstance(b, Uncertain) else Uncertain(b)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        value = ufunc(a.value, b.value)
+        d_a, d_b = _BINARY_DERIVATIVES[ufunc](a.value, b.value, value)
+    return Uncertain._derived(value, _chain(np.shape(value), (d_a, a._terms),
+                                            (d_b, b._terms)))
+
+# partial derivatives (df/da, df/db) of f = ufunc(a, b)
+_BINARY_DERIVATIVES = {
+    np.add:      lambda a, b, f: (1., 1.),
+    np.subtract: lambda a, b, f: (1., -1.),
+    np.multiply: lambda a, b, f: (b, a),
+    np.divide:   lambda a, b, f: (1/b, -f/b),
+    np.power:    lambda a, b, f: (b*a**(b - 1), f*np.log(a)),
+    }
+
+# derivatives df/dx of f = ufunc(x)
+_UNARY_DERIVATIVES = {
+    np.negative: lambda x, f: -1.,
+    np.positive: lambda x, f: 1.,
+    np.absolute: lambda x, f: np.sign(x),
+    np.square:   lambda x, f: 2*x,
+    np.sqrt:     lambda x, f: 0.5/f,
+    np.exp:      lambda x, f: f,
+    np.log:      lambda x, f: 1/x,
+    np.log10:    lambda x, f: 1/(x*np.log(10)),
+    np.log2:     lambda x, f: 1/(x*np.log(2)),
+    np.sin:      lambda x, f: np.cos(x),
+    np.cos:      lambda x, f: -np.sin(x),
+    np.tan:      lambda x, f: 1 + f**2,
+    np.arcsin:   lambda x, f: 1/np.sqrt(1 - x**2),
+    np.arccos:   lambda x, f: -1/np.sqrt(1 - x**2),
+    np.arctan:   lambda x, f: 1/(1 + x**2),
+    np.sinh:     lambda x, f: np.cosh(x),
+    np.cosh:     lambda x, f: np.sinh(x),
+    np.tanh:     lambda x, f: 1 - f**2,
+    }
 
 ### Input Parse ################################################################
 
@@ -410,6 +2029,7 @@ class _InputParseTabular:
     """ InputParser for class Latex_Interface.Tabular
     This is a static class """
 
+    @_stage('validate')
     def test_init(values, uncertainty, alignment):
         "Input parse for the method '__init__' of class Latex_Interface.Tabular"
 
@@ -470,6 +2090,104 @@ class _InputParseTabular:
         ## Return ##
         return n_col, n_row
 
+    @_stage('validate')
+    def test_writeMany(tables, filenames):
+        "Input parse for the function 'writeMany' of Latex_Interface"
+
+        _InputParseTabular.test_tables(tables)
+
+        if type(filenames) is not list:
+            msg = ( "Input \"filenames\" has to be of type \"list\"")
+            raise TypeError(msg)
+
+        if len(tables) != len(filenames):
+            msg = ( "Inputs \"tables\" and \"filenames\" have to be of "
+                    "same length")
+            raise DimensionError(msg)
+
+    @_stage('validate')
+    def test_writeStream(n_col, chunk_size):
+        """Input parse for the method 'writeStream' of class
+        Latex_Interface.LatexTabular"""
+
+        for name, value in (("n_col", n_col), ("chunk_size", chunk_size)):
+            if not isinstance(value, (int, np.integer)) or \
+                    isinstance(value, bool):
+                msg = ( "Input \"" + name + "\" has to be an integer!")
+                raise TypeError(msg)
+
+            if value < 1:
+                msg = ( "Input \"" + name + "\" has to be at least 1!")
+                raise ValueError(msg)
+
+    @_stage('validate')
+    def test_tables(tables):
+        """Input parse for functions of Latex_Interface that process a list
+        of tables"""
+
+        if type(tables) is not list:
+            msg = ( "Input \"tables\" has to be of type \"list\"")
+            raise TypeError(msg)
+
+        for table in tables:
+            if not isinstance(table, LatexTabular):
+                msg = ( "Input \"tables\" has to be a list of instances of "
+                        "class \"LatexTabular\"")
+                raise TypeError(msg)
+
+    @_stage('validate')
+    def test_fromArrays(values, uncertainty, alignment):
+        """Input parse for the method 'fromArrays' of class
+        Latex_Interface.Tabular. Checks shape and dtype of the arrays as a
+        whole and returns them as numpy.ndarrays."""
+
+        values = np.asarray(values)
+        if values.dtype.kind not in 'biuf':
+            msg = ( "Input \"values\" has to be a numeric numpy.ndarray")
+            raise TypeError(msg)
+        if values.ndim != 2:
+            msg = ( "Input \"values\" has to be a 2-dimensional array")
+            raise DimensionError(msg)
+
+        if uncertainty is not None:
+            uncertainty = np.asarray(uncertainty)
+            if uncertainty.dtype.kind not in 'biuf':
+                msg = ( "Input \"uncertainty\" has to be a numeric "
+                        "numpy.ndarray")
+                raise TypeError(msg)
+            if uncertainty.shape != values.shape:
+                msg = ( "Input \"uncertainty\" has to be of same shape as "
+                        "input \"values\"")
+                raise DimensionError(msg)
+
+        if not (alignment == 'horizontal' or alignment == 'vertical'):
+            msg = ( "Value of Input \"alignment\" has to be either "
+                    "'horizontal' or 'vertical'. ")
+            raise ValueError(msg)
+
+        return values, uncertainty
+
+    @_stage('validate')
+    def test_fromColumns(columns, alignment):
+        """Input parse for the method 'fromColumns' of class
+        Latex_Interface.Tabular. The arrays are checked by 'test_fromArrays'
+        once they are stacked."""
+
+        if not isinstance(columns, (list, tuple)):
+            msg = ( "Input \"columns\" has to be a list of 1-D Uncertain "
+                    "arrays or numpy.ndarrays")
+            raise TypeError(msg)
+
+        if not columns:
+            msg = ( "Input \"columns\" must contain at least one column!")
+            raise ValueError(msg)
+
+        if not (alignment == 'horizontal' or alignment == 'vertical'):
+            msg = ( "Value of Input \"alignment\" has to be either "
+                    "'horizontal' or 'vertical'. ")
+            raise ValueError(msg)
+
+    @_stage('validate')
     def test_config(disp_col_names, disp_row_names):
         "Input parse for the method 'config' of class Latex_Interface.Tabular"
 
@@ -481,6 +2199,7 @@ class _InputParseTabular:
             msg = "Input \"disp_row_names\" has to be of type \"bool\" "
             raise TypeError(msg)
 
+    @_stage('validate')
     def test_addNames(names, n_names):
         """Input parse for the methods 'editColNames' and 'editRowNames' of
         class Latex_Interface.Tabular."""
@@ -500,9 +2219,11 @@ class _InputParseTabular:
                     "columns that can be named!" )
             raise ValueError(msg)
 
-    def test_addData(values, uncertainty, pos, n_values, name):
+    @_stage('validate')
+    def test_addData(values, uncertainty, pos, n_pos, n_values, name):
         """Input parse for the method 'addColumn' and 'addRow' of class
-        Latex_Interface.Tabular"""
+        Latex_Interface.Tabular. pos is an empty list to append or in the
+        range 1 ... n_pos, n_values is the maximal number of elements."""
 
         if type(values) is np.ndarray:
             if np.shape(values) != (len(values),):
@@ -522,7 +2243,12 @@ class _InputParseTabular:
                     "strings or numbers or has to be a numpy.ndarray!")
             raise TypeError(msg)
 
-        if not(0 <= pos <= n_values):
+        if type(pos) is list:
+            if pos:
+                msg = ( "Input \"pos\" has to be an integer or an empty " +
+                        "list to append!")
+                raise TypeError(msg)
+        elif not(0 <= pos <= n_pos):
             msg = ( "Input \"pos\" out of range!")
             raise ValueError(msg)
 
@@ -534,7 +2260,7 @@ class _InputParseTabular:
             msg = ( "Input \"uncertainty\" has too many elemtes!")
             raise DimensionError(msg)
 
-        if len(values) != len(uncertainty) and uncertainty :
+        if len(values) != len(uncertainty) and len(uncertainty):
             msg = ( "Input \"uncertainty\" und Input \"values\" have to be " +
                     "of same length!")
             raise DimensionError(msg)
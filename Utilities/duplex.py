@@ -4,17 +4,157 @@
 Created on Mon Mar  4 16:19:07 2019
 
 @author: philippschreiner
+
+usage: duplex.py front.pdf back.pdf [--stream]
+       duplex.py --batch DIR|GLOB [--manifest FILE] [--out DIR] [--workers N]
+
+Interleaves the pages of a scan of the front sides with the reversed pages
+of a scan of the back sides and writes stack.pdf. With --stream the pages
+are written to stack.pdf one by one instead of being collected first, which
+keeps the memory bounded for long scans.
+
+With --batch all scan pairs in a directory (or matching a glob) are merged
+in parallel processes. A pair are the files NAME_front.pdf and
+NAME_back.pdf ('-' or ' ' instead of '_' work as well), its output is
+NAME_stack.pdf. A manifest lists one pair per line instead, as
+'front.pdf,back.pdf[,output.pdf]' relative to the manifest.
 """
 
 import os
 import sys
-from PyPDF2 import PdfFileReader, PdfFileWriter
+import io
+import re
+import mmap
+import csv
+import glob
+import time
+import argparse
+# PyPDF2 and concurrent.futures are imported by the functions that use them,
+# e.g. not for --help
 
 def duplex():
-    files = sys.argv[1:]
+    parser = argparse.ArgumentParser(description = 'Interleaves front and '
+                                     'back side scans.')
+    parser.add_argument('files', nargs = '*', help = 'front.pdf back.pdf')
+    parser.add_argument('--stream', action = 'store_true',
+                        help = 'write the pages one by one')
+    parser.add_argument('--batch', help = 'directory or glob of scan pairs')
+    parser.add_argument('--manifest', help = 'file listing the scan pairs')
+    parser.add_argument('--out', help = 'output directory of --batch')
+    parser.add_argument('--workers', type = int, default = None,
+                        help = 'number of processes of --batch')
+    args = parser.parse_args()
+
+    if args.batch or args.manifest:
+        if args.manifest:
+            pairs = read_manifest(args.manifest)
+        else:
+            pairs, unpaired = pair_scans(args.batch)
+            for name in unpaired:
+                print('no partner for ' + name)
+        if args.out:
+            os.makedirs(args.out, exist_ok = True)
+            pairs = [(f, b, os.path.join(args.out, os.path.basename(o)))
+                     for f, b, o in pairs]
+        results = batch(pairs, args.workers)
+        return 1 if any(error for _, _, _, error in results) else 0
+
+    if len(args.files) != 2:
+        parser.error('expected the front and the back scan')
     path = os.getcwd()
-    front = PdfFileReader(path + '/' + files[0])
-    back = PdfFileReader(path + '/' + files[1])
+    if args.stream:
+        interleave(path + '/' + args.files[0], path + '/' + args.files[1],
+                   path + '/stack.pdf')
+    else:
+        merge(path + '/' + args.files[0], path + '/' + args.files[1],
+              path + '/stack.pdf')
+
+def pair_scans(pattern):
+    """pairs the files NAME_front.pdf and NAME_back.pdf in the directory or
+       glob 'pattern', returns the (front, back, output) triples and the
+       names of the files without partner"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.pdf')
+    sides = {}
+    unpaired = []
+    for name in sorted(glob.glob(pattern)):
+        match = re.match(r'(.*?)[_\- ]?(front|back)\.pdf$', name,
+                         re.IGNORECASE)
+        if match is None:
+            if not re.search(r'stack\.pdf$', name, re.IGNORECASE):
+                unpaired.append(name)
+            continue
+        sides.setdefault(match.group(1), {})[match.group(2).lower()] = name
+
+    pairs = []
+    for stem, pair in sorted(sides.items()):
+        if len(pair) == 2:
+            pairs.append((pair['front'], pair['back'], stem + '_stack.pdf'))
+        else:
+            unpaired.extend(pair.values())
+    return pairs, unpaired
+
+def read_manifest(filename):
+    """reads the (front, back, output) triples of a manifest, the output
+       defaults to FRONT_stack.pdf"""
+    path = os.path.dirname(os.path.abspath(filename))
+    pairs = []
+    with open(filename, newline = '') as f:
+        for row in csv.reader(f):
+            row = [cell.strip() for cell in row]
+            if not row or row[0].startswith('#'):
+                continue
+            front, back = (os.path.join(path, r) for r in row[:2])
+            if len(row) > 2:
+                output = os.path.join(path, row[2])
+            else:
+                output = os.path.splitext(front)[0] + '_stack.pdf'
+            pairs.append((front, back, output))
+    return pairs
+
+def batch(pairs, workers = None):
+    """interleaves the (front, back, output) triples with interleave() in a
+       pool of worker processes and prints a summary, returns a list of
+       (output, pages, seconds, error) per pair"""
+    import concurrent.futures
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_duplex_job(pair) for pair in pairs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_duplex_job, pairs))
+    wall = time.perf_counter() - start
+
+    pages = sum(p for _, p, _, _ in results)
+    failed = [(o, error) for o, _, _, error in results if error]
+    print('{:d} pairs, {:d} pages in {:.2f} s: {:.1f} pages/s'.format(
+          len(results), pages, wall, pages/wall if wall > 0 else 0))
+    print('{:d} failed'.format(len(failed)))
+    for output, error in failed:
+        print('  ' + output + ': ' + error)
+    return results
+
+def _duplex_job(pair):
+    "worker of batch: interleaves one pair, errors are returned as text"
+    front, back, output = pair
+    start = time.perf_counter()
+    try:
+        pages = interleave(front, back, output)
+        error = ''
+    except Exception as e:
+        pages = 0
+        error = type(e).__name__ + ': ' + str(e)
+        if os.path.exists(output):
+            os.remove(output)
+    return output, pages, time.perf_counter() - start, error
+
+def merge(front_name, back_name, out_name):
+    "interleaves the pages in a PdfFileWriter and writes it at the end"
+    from PyPDF2 import PdfFileReader, PdfFileWriter
+
+    front = PdfFileReader(front_name)
+    back = PdfFileReader(back_name)
     numPages = front.getNumPages()
     stack = PdfFileWriter()
 
@@ -22,8 +162,218 @@ def duplex():
         stack.addPage(front.getPage(page))
         stack.addPage(back.getPage(-page-1))
 
-    with open(path + '/stack.pdf','wb') as output:
+    with open(out_name,'wb') as output:
         stack.write(output)
+    return 2*numPages
+
+def interleave(front_name, back_name, out_name):
+    """interleaves the pages while writing them to out_name, returns the
+       number of pages written. The inputs are memory-mapped and their pages
+       are parsed when they are written."""
+    with PageIndex(front_name) as front, PageIndex(back_name) as back, \
+         open(out_name,'wb') as output:
+        numPages = len(front)
+        stack = StreamWriter(output)
+
+        for page in range(numPages):
+            stack.addPage(front.reader, front.getPage(page))
+            stack.addPage(back.reader, back.getPage(-page-1))
+        stack.close()
+    return 2*numPages
+
+class PageIndex():
+    """Pages of a memory-mapped PDF.
+       The page tree is walked once for the references of the pages and the
+       attributes they inherit from it. A page dictionary is parsed from the
+       mapped file only when getPage() is called, in any order, and is not
+       kept afterwards."""
+
+    INHERITABLE = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+    def __init__(self, filename):
+        from PyPDF2 import PdfFileReader
+
+        self.file = open(filename, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                                 access = mmap.ACCESS_READ)
+            self.reader = PdfFileReader(self.map)
+            self.pages = []
+            catalog = self.reader.trailer['/Root'].getObject()
+            self._walk(catalog.raw_get('/Pages'))
+        except BaseException:
+            # the mapping and the file are not left open on any error
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.pages)
+
+    def _walk(self, root):
+        "collects the (reference, inherited attributes) of the pages"
+        stack = [(root, {})]
+        while stack:
+            ref, inherited = stack.pop()
+            node = self.reader.getObject(ref)
+            if '/Kids' in node:
+                inherited = dict(inherited)
+                for attr in self.INHERITABLE:
+                    if attr in node:
+                        inherited[attr] = node.raw_get(attr)
+                stack.extend((kid, inherited)
+                             for kid in reversed(node['/Kids']))
+            else:
+                self.pages.append((ref, inherited))
+        # only the index is kept
+        self.reader.resolvedObjects.clear()
+
+    def getPage(self, page):
+        from PyPDF2.pdf import PageObject
+        from PyPDF2.generic import NameObject
+
+        ref, inherited = self.pages[page]
+        pageObj = PageObject(self.reader, ref)
+        pageObj.update(self.reader.getObject(ref))
+        for attr, value in inherited.items():
+            if attr not in pageObj:
+                pageObj[NameObject(attr)] = value
+        return pageObj
+
+    def close(self):
+        self.reader = None
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+class StreamWriter():
+    """Writes a PDF page by page to the binary file 'output'.
+       Every page is written together with the objects it refers to as soon
+       as it is added, objects shared by several pages (fonts, images, ...)
+       only once. Streams are written as they are stored in the source, they
+       are neither decoded nor encoded again. Pages referred to by other
+       objects (links, annotations) only get their id, they are written by
+       addPage() with the attributes they inherit from the page tree. Only
+       the object offsets and the ids of the objects are kept until
+       close()."""
+
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self, output):
+        self.output = output
+        # offsets of the written objects by their id in the output
+        self.offsets = {}
+        # ids in the output of the source objects, assigned before they
+        # are written, pages possibly long before addPage() writes them
+        self.ids = {}
+        self.kids = []
+        self.next_id = 3
+        output.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def addPage(self, reader, page):
+        page_id = self._id(reader, page.indirectRef)
+        self.kids.append(page_id)
+        if page_id in self.offsets:
+            # the same page added twice
+            return
+
+        pending = [(page_id, page)]
+        while pending:
+            idnum, obj = pending.pop()
+            self._write(idnum, obj, reader, pending)
+        # the written objects are not needed any more
+        reader.resolvedObjects.clear()
+
+    def close(self):
+        for idnum in range(3, self.next_id):
+            if idnum not in self.offsets:
+                # target of a link to a page that was not added
+                self._writeRaw(idnum, b'null')
+        kids = b' '.join(b'%d 0 R' % kid for kid in self.kids)
+        self._writeRaw(self.PAGES, b'<< /Type /Pages /Kids [ ' + kids
+                       + b' ] /Count %d >>' % len(self.kids))
+        self._writeRaw(self.CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>'
+                       % self.PAGES)
+
+        xref = self.output.tell()
+        size = self.next_id
+        self.output.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+        self.output.write(b''.join(b'%010d 00000 n \n' % self.offsets[idnum]
+                                   for idnum in range(1, size)))
+        self.output.write(b'trailer\n<< /Size %d /Root %d 0 R >>\n'
+                          b'startxref\n%d\n%%%%EOF\n'
+                          % (size, self.CATALOG, xref))
+
+    def _id(self, reader, ref):
+        "id in the output of the object ref of reader"
+        key = (id(reader), ref.idnum, ref.generation)
+        if key not in self.ids:
+            self.ids[key] = self.next_id
+            self.next_id += 1
+        return self.ids[key]
+
+    def _write(self, idnum, obj, reader, pending):
+        data = io.BytesIO()
+        self._serialize(obj, data, reader, pending)
+        self._writeRaw(idnum, data.getvalue())
+
+    def _writeRaw(self, idnum, data):
+        self.offsets[idnum] = self.output.tell()
+        self.output.write(b'%d 0 obj\n' % idnum + data + b'\nendobj\n')
+
+    def _serialize(self, obj, data, reader, pending):
+        """writes obj to data with the references renumbered, referenced
+           objects that were not written yet are appended to pending"""
+        from PyPDF2.generic import (IndirectObject, DictionaryObject,
+                                    ArrayObject, StreamObject, NameObject)
+
+        if isinstance(obj, IndirectObject):
+            new = (id(reader), obj.idnum, obj.generation) not in self.ids
+            idnum = self._id(reader, obj)
+            if new:
+                target = reader.getObject(obj)
+                # pages are written by addPage() with their inherited
+                # attributes, a reference only reserves their id
+                if not (isinstance(target, DictionaryObject)
+                        and target.get('/Type') == '/Page'):
+                    pending.append((idnum, target))
+            data.write(b'%d 0 R' % idnum)
+        elif isinstance(obj, DictionaryObject):
+            data.write(b'<<')
+            for key, value in obj.items():
+                if isinstance(obj, StreamObject) and key == '/Length':
+                    continue
+                data.write(b' ')
+                NameObject(key).writeToStream(data, None)
+                data.write(b' ')
+                if key == '/Parent' and obj.get('/Type') == '/Page':
+                    # pages belong to the page tree of the output
+                    data.write(b'%d 0 R' % self.PAGES)
+                else:
+                    self._serialize(value, data, reader, pending)
+            if isinstance(obj, StreamObject):
+                data.write(b' /Length %d >>\nstream\n' % len(obj._data))
+                data.write(obj._data)
+                data.write(b'\nendstream')
+            else:
+                data.write(b' >>')
+        elif isinstance(obj, ArrayObject):
+            data.write(b'[')
+            for value in obj:
+                data.write(b' ')
+                self._serialize(value, data, reader, pending)
+            data.write(b' ]')
+        elif obj is None:
+            data.write(b'null')
+        else:
+            obj.writeToStream(data, None)
 
 if __name__ == '__main__':
     sys.exit(duplex())
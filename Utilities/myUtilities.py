@@ -1,3 +1,6 @@
+import time
+import threading
+
 class progressBar():
     def __init__(self,total,**kwargs):
 
@@ -8,21 +11,126 @@ class progressBar():
             "decimals": 1,        # positive number of decimals
             "length": 50,         # character length of bar (Int)
             "fill": "█",          # bar fill character (Str)
-            "printEnd": "\r"      # printEnd character (e.g. "\r", "\r\n")
+            "printEnd": "\r",     # printEnd character (e.g. "\r", "\r\n")
+            "interval": 0,        # redraw at most every interval ms (Int)
+            "step": 0,            # or every step percent (Float), 0: always
+            "stats": True,        # show elapsed time, ETA and it/s (Bool)
+            "file": None          # stream to print to, default sys.stdout
             }
 
         for (param,default) in attributes.items():
             setattr(self,param,kwargs.get(param,default))
 
+        self.start = time.perf_counter()
+        self.set_total(total)
+
     def update(self,i):
+        if i < self._next:
+            return
+        now = time.perf_counter()
+        if (self.interval and self._last is not None and i < self._stepNext
+                and now - self._last < self.interval/1000):
+            # too early, guess the i at the end of the interval from the
+            # rate since the last redraw. The guess never skips more than
+            # the iterations since the last redraw, so the time is checked
+            # again soon enough if the loop slows down.
+            rate = (i - self._lastI)/max(now - self._last, 1e-9)
+            left = self.interval/1000 - (now - self._last)
+            skip = min(int(rate*left), i - self._lastI)
+            self._next = min(i + max(skip, 1), self._stepNext)
+            return
+        self._draw(i, now)
+
+    def _draw(self,i,now):
         percent = ("{0:."+str(self.decimals)+"f}").format(100*(i/float(self.total)))
         filledlength = int(self.length * i // self.total)
         bar = self.fill * filledlength + '-' * (self.length - filledlength)
 
-        print(f'\r{self.prefix} |{bar}| {percent}% {self.suffix}', end = self.printEnd)
+        line = f'\r{self.prefix} |{bar}| {percent}% {self.suffix}'
+        if self.stats:
+            elapsed = now - self.start
+            rate = i/elapsed if elapsed > 0 else 0.
+            eta = (self.total - i)/rate if rate > 0 else 0.
+            line += f' [{_hms(elapsed)}<{_hms(eta)}, {rate:.1f} it/s]'
+        print(line, end = self.printEnd, file = self.file, flush = True)
         # Print New Line on Complete
         if i == self.total:
-            print()
+            print(file = self.file)
+
+        # the next i to draw: step percent later, earlier if the interval is
+        # over before (checked in update), the last i is always drawn
+        self._last, self._lastI = now, i
+        if self.step:
+            self._stepNext = min(i + max(self.step*self.total/100, 1), self.total)
+        else:
+            self._stepNext = self.total
+        if self.step or self.interval:
+            self._next = min(i + 1, self._stepNext) if self.interval else self._stepNext
+        else:
+            self._next = 0
+
+    def iterate(self,iterable):
+        "yields the items of iterable and advances the bar after each"
+        for i, item in enumerate(iterable, 1):
+            yield item
+            self.update(i)
+
+    def share(self,period = 0.1):
+        """Starts the shared-counter mode and returns the counter, a
+           multiprocessing.Value. Worker threads and processes advance it
+           with advance(counter), pass it to processes when they are
+           created, e.g. in the initargs of a multiprocessing.Pool.
+           A renderer thread redraws the bar from the counter every period
+           seconds, the only one that prints, until the total is reached or
+           stop() is called."""
+        import multiprocessing
+
+        self.counter = multiprocessing.Value('q', 0)
+        self._stop = threading.Event()
+        self._renderer = threading.Thread(target = self._render,
+                                          args = (period,), daemon = True)
+        self._renderer.start()
+        return self.counter
+
+    def _render(self,period):
+        while True:
+            i = self.counter.value
+            self.update(i)
+            if i >= self.total or self._stop.wait(period):
+                break
+
+    def stop(self):
+        "ends the shared-counter mode and draws the final count"
+        self._stop.set()
+        self._renderer.join()
+        i = self.counter.value
+        if i != self._lastI:
+            self._draw(i, time.perf_counter())
 
     def set_total(self,total):
         self.total = total
+        self._next = 0            # next i that is drawn, a single compare
+        if self.step:
+            self._stepNext = min(max(self.step*total/100, 1), total)
+        else:
+            self._stepNext = total
+        # time and i of the last redraw, the first update always draws
+        self._last, self._lastI = None, 0
+
+def progress(iterable,total = None,**kwargs):
+    """yields the items of iterable with a progressBar, total defaults to
+       len(iterable)"""
+    if total is None:
+        total = len(iterable)
+    return progressBar(total,**kwargs).iterate(iterable)
+
+def advance(counter,n = 1):
+    "advances the counter of progressBar.share() by n, for the workers"
+    with counter.get_lock():
+        counter.value += n
+
+def _hms(seconds):
+    "seconds as [h:]mm:ss"
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f'{h:d}:{m:02d}:{s:02d}' if h else f'{m:02d}:{s:02d}'
@@ -1,13 +1,122 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as pt
-from matplotlib import rc
 import numpy as np
+import itertools
+import threading
+import time
+import os
+import shutil
+import hashlib
+import tempfile
+# matplotlib and concurrent.futures are imported by the functions that use
+# them to keep the import fast
+
+# arrow geometry used by draw()
+HEAD_WIDTH = 0.05
+HEAD_LENGTH = 0.05
+SHAFT_WIDTH = 0.001   # default width of matplotlib's FancyArrow
+
+# directory of the LabelCache, None for 'phasor_labels' in matplotlib's cache
+dir_label_cache = None
+
+# one arrow: start and end point as complex numbers and its style
+ARROW_DTYPE = np.dtype([('start', complex), ('end', complex), ('fill', bool),
+                        ('color', object), ('string', object),
+                        ('lineStyle', object)])
+
+class _ArrowCategory():
+    """Arrows of one category (currents, voltages or powers), kept in a
+       structured array of ARROW_DTYPE that grows geometrically."""
+
+    def __init__(self):
+        self.n = 0
+        self.data = np.zeros(8, dtype = ARROW_DTYPE)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def arrows(self):
+        return self.data[:self.n]
+
+    @property
+    def phasors(self):
+        return self.arrows['end'] - self.arrows['start']
+
+    @property
+    def start(self):
+        return _xy(self.arrows['start'])
+
+    @property
+    def end(self):
+        return _xy(self.arrows['end'])
+
+    @property
+    def colors(self):
+        return list(self.arrows['color'])
+
+    @property
+    def strings(self):
+        return list(self.arrows['string'])
+
+    @property
+    def lineStyles(self):
+        return list(self.arrows['lineStyle'])
+
+    @property
+    def fills(self):
+        return list(self.arrows['fill'])
+
+    def append(self,start,end,color,string,LineStyle,fill):
+        new = self._grow(1)
+        new['start'] = complex(*start)
+        new['end'] = complex(*end)
+        new['fill'] = fill
+        # element-wise, a color or dash pattern may be a tuple
+        new['color'][0] = color
+        new['string'][0] = string
+        new['lineStyle'][0] = LineStyle
+
+    def extend(self,start,end,color,string,LineStyle,fill):
+        """appends n arrows, every argument is either a list or array of
+           length n or one value for all arrows"""
+        start, end = np.broadcast_arrays(np.asarray(start, dtype = complex),
+                                         np.asarray(end, dtype = complex))
+        start, end = start.ravel(), end.ravel()
+        new = self._grow(len(start))
+        new['start'] = start
+        new['end'] = end
+        new['fill'] = fill
+        for field, value in [('color', color), ('string', string),
+                             ('lineStyle', LineStyle)]:
+            # a str, a tuple like (1,0,0) or (0,(5,5)) or a list of another
+            # length is one value for all arrows
+            if not (isinstance(value, (list, np.ndarray))
+                    and len(value) == len(new)):
+                value = [value]*len(new)
+            for k, item in enumerate(value):
+                new[field][k] = item
+
+    def _grow(self,k):
+        "adds k arrows and returns them to be filled in"
+        n = self.n + k
+        if n > len(self.data):
+            data = np.zeros(max(n, 2*len(self.data)), dtype = ARROW_DTYPE)
+            data[:self.n] = self.arrows
+            self.data = data
+        new = self.data[self.n:n]
+        self.n = n
+        return new
+
+def _xy(z):
+    "complex numbers (N,) as points (N,2)"
+    return np.stack([z.real, z.imag], axis = 1)
 
 class Phasor():
     """Use Phasor to draw Phasor diagramms.
        Add new arrows by calling add_current(), add_voltage() or
        add_power() respectively. Those are of the form
        add_...(start,end,color,label_string,LineStyle,fill(bool))
+       Many arrows are added at once as arrays of complex phasors with
+       add_currents(), add_voltages() or add_powers().
 
        After adding all arrows, call draw() to plot the diagram.
        All vectors assigned as voltages get normalized with
@@ -18,30 +127,59 @@ class Phasor():
        to decide whether or not the diagram should be drawn immediately
        as well as a 'latex_interpreter'-Argument (bool), set this to True
        if you want the labels to be interpreted with latex.
+       These settings only apply while the diagram is drawn, the global
+       matplotlib rc parameters are not changed.
+
+       Use save() to render the diagram to a file without pyplot and
+       render_many() to render many diagrams in parallel processes.
+
+       With a LabelCache as 'label_cache' the labels are drawn from
+       cached outlines instead of being typeset for every diagram.
        """
 
-    def __init__(self, show = True, latex_interpreter = True):
-        self.currents = []
-        self.voltages = []
-        self.powers = []
+    def __init__(self, show = True, latex_interpreter = True,
+                 label_cache = None):
+        self.currents = _ArrowCategory()
+        self.voltages = _ArrowCategory()
+        self.powers = _ArrowCategory()
         self.fs = 15
         self.show = show
         self.lim = (-1,1)
+        self.label_cache = label_cache
 
-        rc('xtick', labelsize=20)     
-        rc('ytick', labelsize=20)
-
+        self.rc = {'xtick.labelsize': 20, 'ytick.labelsize': 20}
         if latex_interpreter:
-            rc('text', usetex=True)
+            self.rc['text.usetex'] = True
 
     def add_current(self,start,end,color,string,LineStyle,fill):
-        self.currents.append([start,end,color,string,LineStyle,fill])
+        self.currents.append(start,end,color,string,LineStyle,fill)
 
     def add_voltage(self,start,end,color,string,LineStyle,fill):
-        self.voltages.append([start,end,color,string,LineStyle,fill])
+        self.voltages.append(start,end,color,string,LineStyle,fill)
 
     def add_power(self,start,end,color,string,LineStyle,fill):
-        self.powers.append([start,end,color,string,LineStyle,fill])
+        self.powers.append(start,end,color,string,LineStyle,fill)
+
+    def add_currents(self,phasors,colors,strings,LineStyles = '-',
+                     fills = True,origins = 0):
+        """Adds one arrow per complex phasor, from its complex origin to
+           origin + phasor. Every other argument is either an array with
+           one entry per phasor or one value for all of them. For chained
+           diagrams use e.g. origins = np.cumsum(phasors) - phasors."""
+        self.currents.extend(origins,np.add(origins,phasors),colors,strings,
+                             LineStyles,fills)
+
+    def add_voltages(self,phasors,colors,strings,LineStyles = '-',
+                     fills = True,origins = 0):
+        "see add_currents()"
+        self.voltages.extend(origins,np.add(origins,phasors),colors,strings,
+                             LineStyles,fills)
+
+    def add_powers(self,phasors,colors,strings,LineStyles = '-',
+                   fills = True,origins = 0):
+        "see add_currents()"
+        self.powers.extend(origins,np.add(origins,phasors),colors,strings,
+                           LineStyles,fills)
 
     def set_fontsize(self,fs):
         self.fs = fs
@@ -49,64 +187,363 @@ class Phasor():
     def set_limits(self,lim):
         self.lim = (-lim,lim)
 
-    def draw(self):
-        ax = plt.axes(aspect = 'equal')
-        plt.xlim(self.lim)
-        plt.ylim(self.lim)
+    def draw(self, batched = False):
+        """Draws all arrows on new pyplot axes. With batched = True the
+           arrows of each category are drawn as one PolyCollection instead
+           of one FancyArrow patch per arrow, which is much faster for
+           diagrams with hundreds of arrows."""
+        import matplotlib
+        import matplotlib.pyplot as plt
+
+        with matplotlib.rc_context(self.rc):
+            ax = plt.axes(aspect = 'equal')
+            self.draw_on(ax, batched)
+
+            if self.show:
+                plt.show()
+
+    def save(self, filename, dpi = None, batched = True):
+        """Renders the diagram to 'filename' (PNG, SVG, PDF, ... by the
+           extension) on its own Figure, without pyplot and global state."""
+        import matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        with matplotlib.rc_context(self.rc):
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot(aspect = 'equal')
+            self.draw_on(ax, batched)
+            fig.savefig(filename, dpi = dpi)
+
+    def draw_on(self, ax, batched = False):
+        """Draws all arrows on the axes 'ax'. The rc parameters of the
+           diagram have to be active, see draw() and save()."""
+        import matplotlib.patches as pt
+        import matplotlib.collections as mc
+
+        ax.set_xlim(self.lim)
+        ax.set_ylim(self.lim)
 
         for cat in [self.currents,self.voltages,self.powers]:
-            colors = [s[2] for s in cat]
-            strings = [s[3] for s in cat]
-            lineStyles = [s[4] for s in cat]
-            fills = [s[5] for s in cat]
-
-            vecs = [np.array(cp[1])-np.array(cp[0]) for cp in cat]
-            norms = [np.linalg.norm(v) for v in vecs]
-            if len(norms) > 0:
-                norm = np.max(norms)
-            points = [[np.array(v[0])/norm,np.array(v[1])/norm] for v in cat]
-
-            for p,s,c,l,f in zip(points, strings, colors, lineStyles, fills):
-                P = p[0]
-                Q = p[1]
-                PQ = Q - P
-
-                n_PQ = np.array([[0,-1],[1,0]])@PQ/np.linalg.norm(PQ)
-                phi = np.arctan2(PQ[1],PQ[0])*180/np.pi % 180
-
-                if 65 < phi < 115:
-                    phi -= 90
-                elif 115 < phi < 180:
-                    phi -= 180
-
-                if abs(n_PQ[0]) <= 1e-3 and n_PQ[1] < 0:
-                    fact = 0.15
-                elif abs(n_PQ[0]) <= 1e-3 and n_PQ[1] > 0:
-                    fact = 0.02
-                elif abs(n_PQ[1]) <= 1e-3 and n_PQ[0] < 0:
-                    fact = 0.1
-                elif abs(n_PQ[1]) <= 1e-3 and n_PQ[0] < 0:
-                    fact = 0.05
-                elif n_PQ[0] > 0 and n_PQ[1] > 0:
-                    fact = 0.015
-                elif n_PQ[0] < 0 and n_PQ[1] > 0:
-                    fact = 0.1
-                elif n_PQ[0] < 0 and n_PQ[1] < 0:
-                    fact = 0.1
-                elif n_PQ[0] > 0 and n_PQ[1] < 0:
-                    fact = 0.05
-
-                t_coords = P + PQ/2 + n_PQ*fact
-
-                a = pt.FancyArrow(P[0],P[1],PQ[0],PQ[1],\
-                                head_width = 0.05,\
-                                head_length = 0.05,\
-                                length_includes_head = True,\
-                                color = c,\
-                                linestyle = l,\
-                                fill = f)
-                ax.add_patch(a)
-                plt.text(t_coords[0],t_coords[1],s,rotation=phi,color=c,size=self.fs)
-
-        if self.show:
-            plt.show()
+            if len(cat) == 0:
+                continue
+
+            # normalize with respect to the largest arrow of the category
+            norm = np.max(np.abs(cat.phasors))
+            P = cat.start/norm
+            Q = cat.end/norm
+            t_coords, phi = label_geometry(P, Q)
+
+            if batched:
+                facecolors = [c if f else 'none'
+                              for c, f in zip(cat.colors, cat.fills)]
+                arrows = mc.PolyCollection(arrow_vertices(P, Q),
+                                           facecolors = facecolors,
+                                           edgecolors = cat.colors,
+                                           linestyles = cat.lineStyles)
+                ax.add_collection(arrows)
+            else:
+                for p,q,c,l,f in zip(P, Q, cat.colors, cat.lineStyles,
+                                     cat.fills):
+                    PQ = q - p
+                    a = pt.FancyArrow(p[0],p[1],PQ[0],PQ[1],\
+                                    head_width = HEAD_WIDTH,\
+                                    head_length = HEAD_LENGTH,\
+                                    length_includes_head = True,\
+                                    color = c,\
+                                    linestyle = l,\
+                                    fill = f)
+                    ax.add_patch(a)
+
+            for t,r,s,c in zip(t_coords, phi, cat.strings, cat.colors):
+                if self.label_cache is None:
+                    ax.text(t[0],t[1],s,rotation=r,color=c,size=self.fs)
+                else:
+                    self.label_cache.draw(ax,t,s,self.fs,r,c)
+
+    def animate(self, stream, interval = 20):
+        """Draws the arrows once and then updates them with every frame of
+           'stream', an iterable (generator, PhasorBuffer, ...) yielding one
+           complex value per arrow, in the order currents, voltages, powers
+           and within each category in the order they were added.
+           The value replaces the arrow vector, the start point stays.
+           Only the arrow geometry and the label positions are updated, the
+           figure is redrawn with blitting every 'interval' milliseconds.
+           Keep a reference to the returned animation while it runs."""
+        import matplotlib
+        import matplotlib.pyplot as plt
+
+        with matplotlib.rc_context(self.rc):
+            ax = plt.axes(aspect = 'equal')
+            ax.set_xlim(self.lim)
+            ax.set_ylim(self.lim)
+            anim = self._animate_on(ax, stream, interval)
+
+            if self.show:
+                plt.show()
+        return anim
+
+    def _animate_on(self, ax, stream, interval):
+        import matplotlib.collections as mc
+        import matplotlib.animation as animation
+
+        cats = [cat for cat in [self.currents,self.voltages,self.powers]
+                if len(cat) > 0]
+        splits = np.cumsum([len(cat) for cat in cats])[:-1]
+        artists = []
+        for cat in cats:
+            facecolors = [c if f else 'none'
+                          for c, f in zip(cat.colors, cat.fills)]
+            arrows = mc.PolyCollection([], facecolors = facecolors,
+                                       edgecolors = cat.colors,
+                                       linestyles = cat.lineStyles,
+                                       animated = True)
+            ax.add_collection(arrows)
+            texts = [ax.text(0,0,s,color=c,size=self.fs,animated=True)
+                     for s,c in zip(cat.strings, cat.colors)]
+            artists.append((arrows,texts))
+
+        def update(values):
+            values = np.asarray(values, dtype = complex)
+            for cat, (arrows,texts), vals in zip(cats, artists,
+                                                 np.split(values, splits)):
+                PQ = _xy(vals)
+                length = np.abs(vals)
+                norm = np.max(length) or 1
+                P = cat.start/norm
+                Q = P + PQ/norm
+                # zero phasors collapse to a point
+                verts = arrow_vertices(P, Q)
+                verts[length == 0] = Q[length == 0,None,:]
+                arrows.set_verts(verts)
+                with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                    t_coords, phi = label_geometry(P, Q)
+                for t,r,text,l in zip(t_coords, phi, texts, length):
+                    text.set_visible(l != 0)
+                    if l != 0:
+                        text.set_position(t)
+                        text.set_rotation(r)
+            return [a for arrows,texts in artists for a in [arrows]+texts]
+
+        # a stream may run forever: neither cache nor tee (repeat) frames
+        anim = animation.FuncAnimation(ax.figure, update, frames = stream,
+                                       interval = interval, blit = True,
+                                       repeat = False,
+                                       cache_frame_data = False)
+        return anim
+
+def render_many(specs, out_dir, workers = None, dpi = None):
+    """Renders many diagrams to files in a pool of worker processes.
+       'specs' is a list of (filename, Phasor) pairs, the file format
+       follows the extension of the filename, the files are written to
+       'out_dir'. workers defaults to the number of CPUs, 1 renders in
+       this process. Returns a list of (path, seconds) per diagram."""
+    import concurrent.futures
+
+    os.makedirs(out_dir, exist_ok = True)
+    jobs = [(os.path.join(out_dir, filename), phasor, dpi)
+            for filename, phasor in specs]
+    if workers == 1:
+        times = [_render_job(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs)//(4*(workers or os.cpu_count() or 1)))
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            times = list(pool.map(_render_job, jobs, chunksize = chunksize))
+
+    return [(job[0], t) for job, t in zip(jobs, times)]
+
+def _render_job(job):
+    "worker of render_many: renders one diagram and returns the time it took"
+    filename, phasor, dpi = job
+    start = time.perf_counter()
+    phasor.save(filename, dpi)
+    return time.perf_counter() - start
+
+class LabelCache():
+    """Cache of the outlines of rendered labels, kept in memory and as .npz
+       files in 'cache_dir', which persists between runs and processes.
+       When the files exceed 'max_bytes', the least recently used ones are
+       deleted.
+       With usetex = True the labels are typeset with LaTeX, with
+       usetex = False with matplotlib's mathtext. The default None follows
+       the rc parameter 'text.usetex' (so the latex_interpreter of the
+       Phasor) and falls back to mathtext if LaTeX is not installed.
+       The outlines do not depend on the color, which is set when drawing,
+       so one cache entry serves a label in all colors."""
+
+    def __init__(self, cache_dir = None, max_bytes = 2**24, usetex = None):
+        if cache_dir is None:
+            cache_dir = dir_label_cache
+        if cache_dir is None:
+            import matplotlib
+            cache_dir = os.path.join(matplotlib.get_cachedir(), 'phasor_labels')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.usetex = usetex
+        self.outlines = {}
+
+    def _mode(self):
+        import matplotlib
+
+        if self.usetex is None:
+            return (matplotlib.rcParams['text.usetex']
+                    and shutil.which('latex') is not None)
+        return self.usetex
+
+    def outline(self, string, size):
+        """returns the vertices and codes of the outline of 'string' and its
+           width, height and descent, all in points"""
+        import matplotlib
+
+        usetex = self._mode()
+        key = hashlib.sha256(repr((string, float(size), bool(usetex),
+                                   matplotlib.__version__)).encode('utf8'))
+        key = key.hexdigest()
+        if key in self.outlines:
+            return self.outlines[key]
+
+        filename = os.path.join(self.cache_dir, key + '.npz')
+        try:
+            with np.load(filename) as f:
+                outline = f['vertices'], f['codes'], tuple(f['metrics'])
+            os.utime(filename)
+        except (OSError, KeyError, ValueError):
+            outline = self._render(string, size, usetex)
+            self._store(filename, outline)
+
+        self.outlines[key] = outline
+        return outline
+
+    def _render(self, string, size, usetex):
+        from matplotlib.font_manager import FontProperties
+        import matplotlib.textpath as tp
+
+        prop = FontProperties(size = size)
+        path = tp.TextPath((0,0), string, size = size, prop = prop,
+                           usetex = usetex)
+        ismath = 'TeX' if usetex else (string.count('$') > 1)
+        metrics = tp.text_to_path.get_text_width_height_descent(
+            string, prop, ismath)
+        return path.vertices, path.codes, tuple(float(m) for m in metrics)
+
+    def _store(self, filename, outline):
+        os.makedirs(self.cache_dir, exist_ok = True)
+        vertices, codes, metrics = outline
+        # write to a private file first, other processes may read the cache
+        fd, tmp = tempfile.mkstemp(suffix = '.npz', dir = self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, vertices = vertices, codes = codes,
+                     metrics = np.array(metrics))
+        os.replace(tmp, filename)
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def draw(self, ax, xy, string, size, rotation, color):
+        """Draws 'string' at the data coordinates xy of 'ax' like ax.text
+           with its default alignment: the rotated text box starts at xy
+           and the baseline of the unrotated text is at xy."""
+        import matplotlib.patches as pt
+        import matplotlib.path as mpath
+        import matplotlib.transforms as mt
+
+        vertices, codes, (w, h, d) = self.outline(string, size)
+        rotate = mt.Affine2D().rotate_deg(rotation)
+        corners = rotate.transform([[0,-d],[w,-d],[w,h-d],[0,h-d]])
+        # from points to inches, then to pixels, then to xy
+        trans = (rotate.translate(-corners[:,0].min(),
+                                  -corners[:,1].min() - d).scale(1/72)
+                 + ax.figure.dpi_scale_trans
+                 + mt.ScaledTranslation(xy[0], xy[1], ax.transData))
+        patch = pt.PathPatch(mpath.Path(vertices, codes),
+                             transform = trans, color = color, lw = 0)
+        ax.add_patch(patch)
+        return patch
+
+class PhasorBuffer():
+    """Ring buffer for the latest 'capacity' measurements of n phasors.
+       A measurement thread pushes complex values with push(), iterating
+       over the buffer yields the newest measurement forever, so it can be
+       passed to Phasor.animate() directly. The memory stays fixed."""
+
+    def __init__(self, n, capacity = 64):
+        self.data = np.zeros((capacity,n), dtype = complex)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def push(self, values):
+        with self.lock:
+            self.data[self.count % len(self.data)] = values
+            self.count += 1
+
+    def latest(self):
+        with self.lock:
+            return self.data[(self.count - 1) % len(self.data)].copy()
+
+    def __iter__(self):
+        return (self.latest() for _ in itertools.count())
+
+def label_geometry(P, Q):
+    """Label positions and rotations for arrows from P to Q, both (N,2)
+       arrays. The label sits at the middle of the arrow, shifted along the
+       normal by a factor depending on the direction of the normal, and is
+       rotated to the arrow, but never upside down."""
+    PQ = Q - P
+    n_PQ = np.stack([-PQ[:,1], PQ[:,0]], axis = 1)
+    n_PQ = n_PQ/np.linalg.norm(PQ, axis = 1)[:,None]
+    phi = np.arctan2(PQ[:,1],PQ[:,0])*180/np.pi % 180
+    phi = np.where((65 < phi) & (phi < 115), phi - 90,
+                   np.where((115 < phi) & (phi < 180), phi - 180, phi))
+
+    nx, ny = n_PQ[:,0], n_PQ[:,1]
+    fact = np.select([(abs(nx) <= 1e-3) & (ny < 0),
+                      (abs(nx) <= 1e-3) & (ny > 0),
+                      (abs(ny) <= 1e-3) & (nx < 0),
+                      (nx > 0) & (ny > 0),
+                      (nx < 0) & (ny > 0),
+                      (nx < 0) & (ny < 0),
+                      (nx > 0) & (ny < 0)],
+                     [0.15, 0.02, 0.1, 0.015, 0.1, 0.1, 0.05],
+                     default = 0.05)
+
+    t_coords = P + PQ/2 + n_PQ*fact[:,None]
+    return t_coords, phi
+
+def arrow_vertices(P, Q, head_width = HEAD_WIDTH, head_length = HEAD_LENGTH,
+                   width = SHAFT_WIDTH):
+    """Polygon vertices (N,8,2) of full arrows from P to Q that include the
+       head, the same shape as matplotlib's FancyArrow draws."""
+    PQ = Q - P
+    length = np.hypot(PQ[:,0], PQ[:,1])
+    n = len(length)
+
+    # horizontal arrows pointing to (0,0), left half then right half
+    coords = np.empty((n,8,2))
+    coords[:,:,0] = [0, -head_length, -head_length, 0, 0,
+                     -head_length, -head_length, 0]
+    coords[:,[3,4],0] = -length[:,None]
+    coords[:,:,1] = [0, -head_width/2, -width/2, -width/2, width/2, width/2,
+                     head_width/2, 0]
+
+    # rotate onto the arrows and move the tips to Q
+    safe = np.where(length != 0, length, 1)
+    cx = np.where(length != 0, PQ[:,0]/safe, 0)
+    sx = np.where(length != 0, PQ[:,1]/safe, 1)
+    x = coords[:,:,0]*cx[:,None] - coords[:,:,1]*sx[:,None]
+    y = coords[:,:,0]*sx[:,None] + coords[:,:,1]*cx[:,None]
+    return np.stack([x, y], axis = 2) + Q[:,None,:]